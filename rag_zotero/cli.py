@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+from functools import cache, partial
+from collections import defaultdict
+from collections.abc import Callable, Iterable
 from pathlib import Path
+from typing import Any
 import json
+import os
 import sys
 import textwrap
+import time
 
 import typer
 from rich.console import Console
@@ -17,17 +23,180 @@ from rich.progress import (
 )
 from rich.table import Table
 
-from .config import load_config
-from .embeddings import resolve_embeddings
-from .indexer import index_file
-from .vectorstore import get_collection, query_collection
+try:  # optional speedup: C-accelerated JSON encoding
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from .config import AppConfig, load_config
+from .embeddings import embedding_model_id, resolve_embeddings
+from .indexer import ChunkBatcher, collect_chunks, prefetch_map
+from .query_cache import embed_query_cached
+from .vectorstore import get_collection, l2_normalize, query_collection
 from .zotero_scan import scan_storage
-from .zotero_export import attachment_key_from_storage_path, load_zotero_export
+from .zotero_export import (
+    ZoteroExportIndex,
+    attachment_key_from_storage_path,
+    load_zotero_export,
+)
 
 
 app = typer.Typer(no_args_is_help=True)
 console = Console()
 
+# Metadata fields that indicate a scanned file was matched against the export.
+_MATCH_KEYS = ("title", "year", "doi", "url", "citekey")
+_MATCH_PROBE = 50
+
+_PROGRESS_UPDATE_INTERVAL_S = 0.1
+
+# Metadata fields surfaced at the top level of `query --json` results.
+_RESULT_FIELDS = ("title", "year", "source_path", "page")
+
+_INFO_TMPL = "Title: {title}\nYear: {year}\nPage: {page}\nWriters: {creators}\nKey: {citekey}\n\n"
+
+
+def _cfg() -> AppConfig:
+    return _cfg_for_cwd(os.getcwd())
+
+
+@cache
+def _cfg_for_cwd(cwd: str) -> AppConfig:
+    # Loaded once per working directory (.env is looked up from there) so programmatic
+    # callers don't re-read it on every command.
+    return load_config()
+
+
+def _stdout_bytes() -> Callable[[bytes], object]:
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is not None:
+        return buffer.write
+    return lambda data: sys.stdout.write(data.decode("utf-8"))
+
+
+def _orjson_dumps(obj: Any, *, indent: bool = False) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, default=str, option=option)
+
+
+def _write_json(payload: Any, *, indent: int | None = None) -> None:
+    if orjson is not None:
+        write = _stdout_bytes()
+        write(_orjson_dumps(payload, indent=bool(indent)) + b"\n")
+        sys.stdout.flush()
+        return
+    json.dump(payload, sys.stdout, ensure_ascii=False, indent=indent)
+    sys.stdout.write("\n")
+
+
+def _write_json_streaming(
+    payload: dict[str, Any], *, rows_key: str, rows: Iterable[Any]
+) -> None:
+    """Write `payload` as JSON with `payload[rows_key]` replaced by `rows`, encoded one by one.
+
+    Avoids materializing the full document (or the row list) for large outputs.
+    """
+    if orjson is not None:
+        write_bytes = _stdout_bytes()
+
+        def write(text: str) -> None:
+            write_bytes(text.encode("utf-8"))
+
+        def emit(obj: Any) -> None:
+            write_bytes(_orjson_dumps(obj))
+
+    else:
+        write = sys.stdout.write
+
+        def emit(obj: Any) -> None:
+            json.dump(obj, sys.stdout, ensure_ascii=False)
+
+    write("{")
+    for i, (key, value) in enumerate(payload.items()):
+        if i:
+            write(", ")
+        emit(key)
+        write(": ")
+        if key != rows_key:
+            emit(value)
+            continue
+        write("[")
+        for j, row in enumerate(rows):
+            if j:
+                write(", ")
+            emit(row)
+        write("]")
+    write("}\n")
+    sys.stdout.flush()
+
+
+def _log_file_status(progress: Progress, name: str, msg: str) -> None:
+    progress.console.log(f"[dim]{name}[/dim]: {msg}")
+
+
+class _Session:
+    """Handles shared by commands in one process; embedder and collection are created lazily.
+
+    Stored on `ctx.obj`, so programmatic callers can pass one in (`app(obj=...)`) and reuse a
+    loaded embedding model across invocations.
+    """
+
+    def __init__(self, cfg: AppConfig) -> None:
+        self.cfg = cfg
+        self._embeddings: tuple[Any, str] | None = None
+        self._collection = None
+        self._collection_checked = False
+
+    def embeddings(self) -> tuple[Any, str]:
+        if self._embeddings is None:
+            self._embeddings = resolve_embeddings(
+                openai_api_key=self.cfg.openai_api_key,
+                openai_model=self.cfg.openai_embed_model,
+                openai_dimensions=self.cfg.openai_embed_dimensions,
+            )
+        return self._embeddings
+
+    def collection(self, *, for_indexing: bool = False):
+        if self._collection is None or (for_indexing and not self._collection_checked):
+            self._collection = get_collection(
+                chroma_dir=self.cfg.chroma_path(),
+                name=self.cfg.chroma_collection,
+                for_indexing=for_indexing,
+            )
+            self._collection_checked = for_indexing
+        return self._collection
+
+
+@app.callback()
+def _main(ctx: typer.Context) -> None:
+    """Index Zotero PDFs into a local vector DB and query them."""
+    if not isinstance(ctx.obj, _Session):
+        ctx.obj = _Session(_cfg())
+
+
+def _result_rows(results: list, eval_by_idx: dict[int, Any]) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for i, r in enumerate(results):
+        # Missing and falsy values (None, 0, "") all render as "".
+        meta_get = r.metadata.get
+        title, year, source_path, page = [meta_get(k) or "" for k in _RESULT_FIELDS]
+        item = eval_by_idx.get(i)
+        rows.append(
+            {
+                "score": r.score,
+                "title": title,
+                "year": year,
+                "source_path": source_path,
+                "page": page,
+                "text": (r.document or "").replace("\n", " ").strip(),
+                "eval_score": item.score if item else None,
+                "eval_rationale": item.rationale if item else None,
+                "metadata": r.metadata,
+            }
+        )
+    return rows
+
 
 def _as_path(p: str | None) -> Path | None:
     if not p:
@@ -35,20 +204,30 @@ def _as_path(p: str | None) -> Path | None:
     return Path(p).expanduser()
 
 
+def _any_match(export_index: ZoteroExportIndex, paths: list[Path], storage_dir: Path) -> bool:
+    """True if any of `paths` has export metadata; stops at the first hit."""
+    meta_for = export_index.metadata_for_attachment
+    for p in paths:
+        akey = attachment_key_from_storage_path(file_path=p, storage_dir=storage_dir)
+        meta = meta_for(akey) if akey else {}
+        if any(meta.get(k) for k in _MATCH_KEYS):
+            return True
+    return False
+
+
 @app.command()
 def doctor(
+    ctx: typer.Context,
     live: bool = typer.Option(
         False, help="Run a live embedding request (may download models / call APIs)"
     )
 ) -> None:
-    cfg = load_config()
+    session: _Session = ctx.obj
+    cfg = session.cfg
     chroma_dir = cfg.chroma_path()
 
     try:
-        embedder, backend = resolve_embeddings(
-            openai_api_key=cfg.openai_api_key,
-            openai_model=cfg.openai_embed_model,
-        )
+        embedder, backend = session.embeddings()
         embed_ok = True
         if live:
             _ = embedder.embed_query("ping")
@@ -70,50 +249,77 @@ def doctor(
 
 @app.command()
 def scan(
+    ctx: typer.Context,
     storage_dir: str = typer.Option(..., help="Path to Zotero storage/ folder"),
     limit: int = typer.Option(1000, help="Max files to print"),
     export_json: str | None = typer.Option(
         None, help="Path to Zotero/BetterBibTeX JSON export for metadata"
     ),
     json_output: bool = typer.Option(False, "--json", help="Output machine-readable JSON"),
+    scan_workers: int | None = typer.Option(
+        None, help="Directory scan threads (default: up to 8 on local disks, 16 on network mounts)"
+    ),
+    scan_cache: bool = typer.Option(
+        False,
+        "--scan-cache",
+        help="Reuse a cached storage/ listing until storage/ or an attachment folder directly "
+        "in it changes mtime. Files added or removed in nested subfolders, or within the "
+        "filesystem's mtime granularity, are missed until the next uncached scan.",
+    ),
+    no_export_cache: bool = typer.Option(
+        False,
+        "--no-export-cache",
+        help="Always parse --export-json (the parsed export is reused until the file's mtime "
+        "or size changes)",
+    ),
 ) -> None:
     storage_path = _as_path(storage_dir) or Path(storage_dir)
-    files = scan_storage(storage_path)
+    files = scan_storage(
+        storage_path,
+        workers=scan_workers,
+        cache_dir=ctx.obj.cfg.cache_path() if scan_cache else None,
+    )
 
     export_index = None
     export_stats = None
     if export_json:
-        export_index = load_zotero_export(Path(export_json).expanduser())
+        export_index = load_zotero_export(
+            Path(export_json).expanduser(),
+            cache_dir=None if no_export_cache else ctx.obj.cfg.cache_path(),
+        )
         export_stats = {
-            "items": len(export_index.items_by_key),
+            "items": len(export_index.item_rows),
             "attachment_links": len(export_index.attachment_to_parent),
         }
 
+    akey_for = partial(attachment_key_from_storage_path, storage_dir=storage_path)
+
+    shown = files[: max(0, limit)]
+
     if json_output:
-        rows: list[dict] = []
-        for p in files[: max(0, limit)]:
-            akey = None
-            meta = None
-            if export_index:
-                akey = attachment_key_from_storage_path(file_path=p, storage_dir=storage_path)
-                meta = export_index.metadata_for_attachment(akey) if akey else None
-            rows.append(
+        rows: Iterable[dict[str, Any]]
+        if export_index is not None:
+            meta_for = export_index.metadata_for_attachment
+            akeys = (akey_for(file_path=p) for p in shown)
+            rows = (
                 {
                     "path": str(p),
                     "attachment_key": akey,
-                    "metadata": meta or {},
+                    "metadata": meta_for(akey) if akey else {},
                 }
+                for p, akey in zip(shown, akeys)
             )
-        print(
-            json.dumps(
-                {
-                    "storage_dir": str(storage_path),
-                    "files_total": len(files),
-                    "files": rows,
-                    "export": export_stats or {},
-                },
-                ensure_ascii=False,
-            )
+        else:
+            rows = ({"path": str(p), "attachment_key": None, "metadata": {}} for p in shown)
+        _write_json_streaming(
+            {
+                "storage_dir": str(storage_path),
+                "files_total": len(files),
+                "files": None,
+                "export": export_stats or {},
+            },
+            rows_key="files",
+            rows=rows,
         )
         return
 
@@ -123,25 +329,9 @@ def scan(
             f"Loaded export: {export_stats['items']} items, {export_stats['attachment_links']} attachment links"
         )
 
-        sample = files[: min(len(files), 50)]
-        matched = 0
-        for p in sample:
-            akey = attachment_key_from_storage_path(file_path=p, storage_dir=storage_path)
-            if not akey:
-                continue
-            meta = export_index.metadata_for_attachment(akey)
-            if any(meta.get(k) for k in ("title", "year", "doi", "url", "citekey")):
-                matched += 1
-        if sample and matched == 0:
-            console.print(
-                "[yellow]No attachment metadata matched scanned files.[/yellow] "
-                "Ensure you exported a full library as Zotero JSON or BetterBibTeX JSON "
-                "(not CSL JSON/bibliography exports, which typically lack attachment keys)."
-            )
-
-    for p in files[: max(0, limit)]:
+    for p in shown:
         if export_index:
-            akey = attachment_key_from_storage_path(file_path=p, storage_dir=storage_path)
+            akey = akey_for(file_path=p)
             meta = export_index.metadata_for_attachment(akey) if akey else {}
             title = meta.get("title") or ""
             year = meta.get("year") or ""
@@ -154,44 +344,97 @@ def scan(
         else:
             console.print(str(p))
 
+    probe = files[:_MATCH_PROBE]
+    if export_index and probe and not _any_match(export_index, probe, storage_path):
+        console.print(
+            "[yellow]No attachment metadata matched scanned files.[/yellow] "
+            "Ensure you exported a full library as Zotero JSON or BetterBibTeX JSON "
+            "(not CSL JSON/bibliography exports, which typically lack attachment keys)."
+        )
+
 
 @app.command()
 def index(
+    ctx: typer.Context,
     storage_dir: str = typer.Option(..., help="Path to Zotero storage/ folder"),
     limit: int | None = typer.Option(None, help="Index only first N files (debug)"),
     continue_on_error: bool = typer.Option(True, help="Continue if a file fails to index"),
     export_json: str | None = typer.Option(
         None, help="Path to Zotero/BetterBibTeX JSON export for metadata"
     ),
+    embed_batch_size: int = typer.Option(
+        128, help="Chunks (across files) sent per embedding request"
+    ),
+    max_inflight: int = typer.Option(
+        4, help="Max concurrent embedding requests (API backends only; local models use 1)"
+    ),
+    prefetch: bool = typer.Option(
+        True,
+        "--prefetch/--no-prefetch",
+        help="Extract/chunk the next files on one background thread while embedding "
+        "(PyMuPDF is not thread-safe, so never more than one)",
+    ),
+    scan_workers: int | None = typer.Option(
+        None, help="Directory scan threads (default: up to 8 on local disks, 16 on network mounts)"
+    ),
+    scan_cache: bool = typer.Option(
+        False,
+        "--scan-cache",
+        help="Reuse a cached storage/ listing until storage/ or an attachment folder directly "
+        "in it changes mtime. Files added or removed in nested subfolders, or within the "
+        "filesystem's mtime granularity, are missed until the next uncached scan.",
+    ),
+    no_export_cache: bool = typer.Option(
+        False,
+        "--no-export-cache",
+        help="Always parse --export-json (the parsed export is reused until the file's mtime "
+        "or size changes)",
+    ),
 ) -> None:
-    cfg = load_config()
-    embedder, backend = resolve_embeddings(
-        openai_api_key=cfg.openai_api_key,
-        openai_model=cfg.openai_embed_model,
-    )
+    session: _Session = ctx.obj
+    cfg = session.cfg
+    embedder, backend = session.embeddings()
     console.print(f"Embeddings backend: {backend}")
 
     storage_path = _as_path(storage_dir) or Path(storage_dir)
     console.print("Scanning storage...")
-    files = scan_storage(storage_path)
+    files = scan_storage(
+        storage_path,
+        workers=scan_workers,
+        cache_dir=cfg.cache_path() if scan_cache else None,
+    )
     if limit is not None:
         files = files[: max(0, int(limit))]
     console.print(f"Found {len(files)} files")
     if not files:
         raise typer.Exit(code=0)
 
-    collection = get_collection(chroma_dir=cfg.chroma_path(), name=cfg.chroma_collection)
+    try:
+        collection = session.collection(for_indexing=True)
+    except RuntimeError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from exc
 
     export_index = None
     if export_json:
         console.print("Loading Zotero export metadata...")
-        export_index = load_zotero_export(Path(export_json).expanduser())
+        export_index = load_zotero_export(
+            Path(export_json).expanduser(),
+            cache_dir=None if no_export_cache else cfg.cache_path(),
+        )
         console.print(
-            f"Loaded export: {len(export_index.items_by_key)} items, "
+            f"Loaded export: {len(export_index.item_rows)} items, "
             f"{len(export_index.attachment_to_parent)} attachment links"
         )
 
-    results = []
+    meta_by_path: dict[Path, dict[str, Any]] = {}
+    if export_index:
+        akey_for = partial(attachment_key_from_storage_path, storage_dir=storage_path)
+        meta_for = export_index.metadata_for_attachment
+        meta_by_path = {
+            p: meta_for(akey) for p, akey in ((p, akey_for(file_path=p)) for p in files) if akey
+        }
+
     failed = 0
     with Progress(
         SpinnerColumn(),
@@ -200,39 +443,58 @@ def index(
         MofNCompleteColumn(),
         TimeElapsedColumn(),
         console=console,
+        refresh_per_second=4,
     ) as progress:
         task = progress.add_task("Indexing", total=len(files))
-
-        for path in files:
-            progress.update(task, description=f"Indexing {path.name}")
-
-            extra_metadata = None
-            if export_index:
-                akey = attachment_key_from_storage_path(file_path=path, storage_dir=storage_path)
-                extra_metadata = export_index.metadata_for_attachment(akey) if akey else None
-
-            def status(msg: str, p: Path = path) -> None:
-                progress.console.log(f"[dim]{p.name}[/dim]: {msg}")
-
-            try:
-                results.append(
-                    index_file(
-                        path=path,
-                        collection=collection,
-                        embedder=embedder,
-                        chunk_size=cfg.chunk_size,
-                        chunk_overlap=cfg.chunk_overlap,
-                        extra_metadata=extra_metadata,
-                        status=status,
-                    )
+        last_update = 0.0
+
+        def on_error(p: Path, exc: Exception) -> None:
+            nonlocal failed
+            failed += 1
+            progress.console.log(f"[red]{p.name}[/red]: failed ({exc})")
+            if not continue_on_error:
+                raise exc
+
+        with ChunkBatcher(
+            collection=collection,
+            embedder=embedder,
+            batch_size=embed_batch_size,
+            max_inflight=max_inflight if backend == "openai" else 1,
+            on_error=on_error,
+            status=lambda msg: progress.console.log(f"[dim]{msg}[/dim]"),
+        ) as batcher:
+            def collect(path: Path) -> tuple[list[str], list[str], list[dict]]:
+                return collect_chunks(
+                    path=path,
+                    chunk_size=cfg.chunk_size,
+                    chunk_overlap=cfg.chunk_overlap,
+                    extra_metadata=meta_by_path.get(path),
+                    status=partial(_log_file_status, progress, path.name),
                 )
-            except Exception as exc:
-                failed += 1
-                progress.console.log(f"[red]{path.name}[/red]: failed ({exc})")
-                if not continue_on_error:
-                    raise
-            finally:
-                progress.advance(task)
+
+            for path, chunks, exc in prefetch_map(collect, files, workers=1 if prefetch else 0):
+                # Renaming the task re-renders the live display; do it at most every 100ms.
+                now = time.monotonic()
+                if now - last_update >= _PROGRESS_UPDATE_INTERVAL_S:
+                    progress.update(task, description=f"Indexing {path.name}")
+                    last_update = now
+
+                try:
+                    if exc is not None:
+                        failed += 1
+                        progress.console.log(f"[red]{path.name}[/red]: failed ({exc})")
+                        if not continue_on_error:
+                            raise exc
+                        continue
+                    ids, docs, metas = chunks
+                    if not docs:
+                        _log_file_status(progress, path.name, "No extractable text; skipped")
+                    # Embedding failures are reported through `on_error`.
+                    batcher.add(path, ids, docs, metas)
+                finally:
+                    progress.advance(task)
+
+        results = batcher.results
 
     total_chunks = sum(r.chunks_added for r in results)
     console.print(
@@ -243,6 +505,7 @@ def index(
 
 @app.command()
 def query(
+    ctx: typer.Context,
     q: str = typer.Argument(..., help="Query text"),
     n: int = typer.Option(7, help="Number of results"),
     json_output: bool = typer.Option(False, "--json", help="Output machine-readable JSON"),
@@ -260,15 +523,27 @@ def query(
         "--insecure",
         help="Disable TLS verification for OpenRouter (use only behind corporate proxies)",
     ),
+    eval_concurrency: int = typer.Option(
+        8,
+        help="Concurrent OpenRouter requests, one per result (1 = score all results in one call)",
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Always re-embed the query (skip the on-disk query cache)"
+    ),
 ) -> None:
-    cfg = load_config()
-    embedder, backend = resolve_embeddings(
-        openai_api_key=cfg.openai_api_key,
-        openai_model=cfg.openai_embed_model,
-    )
-
-    collection = get_collection(chroma_dir=cfg.chroma_path(), name=cfg.chroma_collection)
-    q_emb = embedder.embed_query(q)
+    session: _Session = ctx.obj
+    cfg = session.cfg
+    embedder, backend = session.embeddings()
+
+    collection = session.collection()
+    if no_cache:
+        q_emb = embedder.embed_query(q)
+    else:
+        q_emb = embed_query_cached(
+            embedder, q, model=embedding_model_id(embedder), cache_dir=cfg.cache_path()
+        )
+    # Normalized once here so the (inner-product) index never has to.
+    q_emb = l2_normalize(q_emb)
     results = query_collection(collection, q_emb, n_results=n)
 
     eval_report = None
@@ -280,7 +555,10 @@ def query(
                 "Missing OPENROUTER_API_KEY (required when using --eval).",
                 param_hint="--eval",
             )
-        from .llm_eval import evaluate_relevance_openrouter
+        from .llm_eval import (
+            evaluate_relevance_openrouter,
+            evaluate_relevance_openrouter_parallel,
+        )
 
         candidates = []
         for idx, r in enumerate(results):
@@ -295,14 +573,32 @@ def query(
                 }
             )
         try:
-            eval_report = evaluate_relevance_openrouter(
-                api_key=cfg.openrouter_api_key,
-                model=eval_model or cfg.openrouter_eval_model,
-                query=q,
-                candidates=candidates,
-                insecure=eval_insecure,
-            )
+            if eval_concurrency > 1:
+                eval_report = evaluate_relevance_openrouter_parallel(
+                    api_key=cfg.openrouter_api_key,
+                    model=eval_model or cfg.openrouter_eval_model,
+                    query=q,
+                    candidates=candidates,
+                    insecure=eval_insecure,
+                    concurrency=eval_concurrency,
+                )
+            else:
+                eval_report = evaluate_relevance_openrouter(
+                    api_key=cfg.openrouter_api_key,
+                    model=eval_model or cfg.openrouter_eval_model,
+                    query=q,
+                    candidates=candidates,
+                    insecure=eval_insecure,
+                )
             eval_by_idx = {item.idx: item for item in eval_report.items}
+            if eval_report.errors:
+                first_idx, first_msg = next(iter(eval_report.errors.items()))
+                eval_error = (
+                    f"{len(eval_report.errors)} of {len(candidates)} evaluation requests failed "
+                    f"(result {first_idx}: {first_msg})"
+                )
+                if not json_output:
+                    console.print(f"[yellow]LLM evaluation incomplete:[/yellow] {eval_error}")
         except Exception as exc:
             eval_error = str(exc)
             if not json_output:
@@ -313,51 +609,34 @@ def query(
                 )
 
     if json_output:
-        print(
-            json.dumps(
-                {
-                    "backend": backend,
-                    "query": q,
-                    "n": n,
-                    "evaluation_error": eval_error,
-                    "evaluation": (
-                        {
-                            "provider": eval_report.provider,
-                            "model": eval_report.model,
-                            "items": [
-                                {
-                                    "idx": item.idx,
-                                    "score": item.score,
-                                    "rationale": item.rationale,
-                                }
-                                for item in eval_report.items
-                            ],
-                        }
-                        if eval_report
-                        else None
-                    ),
-                    "results": [
-                        {
-                            "score": r.score,
-                            "title": r.metadata.get("title") or "",
-                            "year": r.metadata.get("year") or "",
-                            "source_path": r.metadata.get("source_path") or "",
-                            "page": r.metadata.get("page") or "",
-                            "text": (r.document or "").replace("\n", " ").strip(),
-                            "eval_score": (
-                                eval_by_idx.get(i).score if eval_by_idx.get(i) else None
-                            ),
-                            "eval_rationale": (
-                                eval_by_idx.get(i).rationale if eval_by_idx.get(i) else None
-                            ),
-                            "metadata": r.metadata,
-                        }
-                        for i, r in enumerate(results)
-                    ],
-                },
-                ensure_ascii=False,
-                indent=2,
-            )
+        _write_json(
+            {
+                "backend": backend,
+                "query": q,
+                "n": n,
+                "evaluation_error": eval_error,
+                "evaluation": (
+                    {
+                        "provider": eval_report.provider,
+                        "model": eval_report.model,
+                        "items": [
+                            {
+                                "idx": item.idx,
+                                "score": item.score,
+                                "rationale": item.rationale,
+                            }
+                            for item in eval_report.items
+                        ],
+                        "errors": [
+                            {"idx": idx, "error": msg} for idx, msg in eval_report.errors.items()
+                        ],
+                    }
+                    if eval_report
+                    else None
+                ),
+                "results": _result_rows(results, eval_by_idx),
+            },
+            indent=2,
         )
         return
 
@@ -371,16 +650,12 @@ def query(
     table.add_column("Info")
     table.add_column("Text")
     for i, r in enumerate(results):
-        info = f"""Title: {r.metadata.get('title', '')}
-Year: {r.metadata.get('year') or ''}
-Page: {r.metadata.get("page", "")}
-Writers: {r.metadata.get('creators' '')}
-Key: {r.metadata.get("citekey", "")}
-
-"""
+        info = _INFO_TMPL.format_map(defaultdict(str, r.metadata))
         if eval_report and (item := eval_by_idx.get(i)):
             rationale = item.rationale
             info += f"LLM relevance: {item.score:.2f}\nLLM: {rationale}\n"
+        elif eval_report and (err := eval_report.errors.get(i)):
+            info += f"LLM evaluation failed: {err}\n"
         text = str((r.document or "").replace("\n", " ").strip())
         table.add_row(f"{r.score:.3f}", info, text)
     console.print(table)
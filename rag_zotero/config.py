@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from dotenv import find_dotenv, load_dotenv
-from pydantic import BaseModel, Field
 
 import os
 
 
+def _resolve_dir(raw: str) -> Path:
+    # Not cached: relative defaults like ./data/chroma depend on the current directory.
+    return Path(raw).expanduser().resolve()
+
+
+def _default_cache_dir() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return os.path.join(base, "rag_zotero")
+
+
 def _env_int(name: str, default: int) -> int:
     value = os.getenv(name)
     if value is None or value == "":
@@ -16,28 +25,48 @@ def _env_int(name: str, default: int) -> int:
     return int(value)
 
 
-class AppConfig(BaseModel):
-    chroma_dir: str = Field(default_factory=lambda: os.getenv("CHROMA_DIR", "./data/chroma"))
-    chroma_collection: str = Field(default_factory=lambda: os.getenv("CHROMA_COLLECTION", "zotero"))
+@dataclass(frozen=True, slots=True)
+class AppConfig:
+    chroma_dir: str = "./data/chroma"
+    chroma_collection: str = "zotero"
 
-    openai_api_key: str | None = Field(default_factory=lambda: os.getenv("OPENAI_API_KEY") or None)
-    openai_embed_model: str = Field(
-        default_factory=lambda: os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
-    )
+    openai_api_key: str | None = None
+    openai_embed_model: str = "text-embedding-3-small"
+    openai_embed_dimensions: int | None = None
 
-    openrouter_api_key: str | None = Field(default_factory=lambda: os.getenv("OPENROUTER_API_KEY") or None)
-    openrouter_eval_model: str = Field(
-        default_factory=lambda: os.getenv("OPENROUTER_EVAL_MODEL", "openai/gpt-4o-mini")
-    )
+    openrouter_api_key: str | None = None
+    openrouter_eval_model: str = "openai/gpt-4o-mini"
 
-    chunk_size: int = Field(default_factory=lambda: _env_int("CHUNK_SIZE", 1200))
-    chunk_overlap: int = Field(default_factory=lambda: _env_int("CHUNK_OVERLAP", 200))
+    chunk_size: int = 1200
+    chunk_overlap: int = 200
+
+    cache_dir: str = field(default_factory=_default_cache_dir)
+
+    @classmethod
+    def from_env(cls) -> AppConfig:
+        """Build from the environment; unset variables fall back to the field defaults."""
+        raw = {
+            "chroma_dir": os.getenv("CHROMA_DIR"),
+            "chroma_collection": os.getenv("CHROMA_COLLECTION"),
+            "openai_api_key": os.getenv("OPENAI_API_KEY") or None,
+            "openai_embed_model": os.getenv("OPENAI_EMBED_MODEL"),
+            "openai_embed_dimensions": _env_int("OPENAI_EMBED_DIMENSIONS", 0) or None,
+            "openrouter_api_key": os.getenv("OPENROUTER_API_KEY") or None,
+            "openrouter_eval_model": os.getenv("OPENROUTER_EVAL_MODEL"),
+            "chunk_size": _env_int("CHUNK_SIZE", 1200),
+            "chunk_overlap": _env_int("CHUNK_OVERLAP", 200),
+            "cache_dir": os.getenv("RAG_ZOTERO_CACHE_DIR") or None,
+        }
+        return cls(**{k: v for k, v in raw.items() if v is not None})
 
     def chroma_path(self) -> Path:
-        return Path(self.chroma_dir).expanduser().resolve()
+        return _resolve_dir(self.chroma_dir)
+
+    def cache_path(self) -> Path:
+        return _resolve_dir(self.cache_dir)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RuntimeInfo:
     python: str
     chroma_dir: str
@@ -57,4 +86,4 @@ def load_config() -> AppConfig:
         load_dotenv(dotenv_path=dotenv_path, override=dotenv_override)
     else:
         load_dotenv(override=dotenv_override)
-    return AppConfig()
+    return AppConfig.from_env()
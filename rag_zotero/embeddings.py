@@ -1,30 +1,48 @@
 from __future__ import annotations
 
+import base64
 from dataclasses import dataclass
-from typing import Protocol
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class Embeddings(Protocol):
-    def embed_texts(self, texts: list[str]) -> list[list[float]]: ...
-    def embed_query(self, query: str) -> list[float]: ...
+    # One float32 row per text; a single (N, dim) array avoids N*dim Python floats.
+    def embed_texts(self, texts: list[str]) -> np.ndarray: ...
+    def embed_query(self, query: str) -> np.ndarray: ...
 
 
 @dataclass
 class OpenAIEmbeddings:
     api_key: str
     model: str
+    # text-embedding-3-* can return shortened vectors: smaller index, faster search.
+    dimensions: int | None = None
 
-    def _client(self):
+    @cached_property
+    def client(self):
+        # One client per embedder so its HTTP connection pool (keep-alive) is reused.
         from openai import OpenAI
 
         return OpenAI(api_key=self.api_key)
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        client = self._client()
-        resp = client.embeddings.create(model=self.model, input=texts)
-        return [d.embedding for d in resp.data]
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        import numpy as np
+
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        # base64 float32 payloads are ~3x smaller than JSON floats, and with an explicit
+        # encoding_format the SDK hands them over undecoded instead of building float lists.
+        resp = self.client.embeddings.create(
+            model=self.model, input=texts, encoding_format="base64", **kwargs
+        )
+        return np.stack(
+            [np.frombuffer(base64.b64decode(d.embedding), dtype="<f4") for d in resp.data]
+        ).astype(np.float32, copy=False)
 
-    def embed_query(self, query: str) -> list[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         return self.embed_texts([query])[0]
 
 
@@ -32,23 +50,44 @@ class OpenAIEmbeddings:
 class SentenceTransformersEmbeddings:
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
 
-    def _model(self):
+    @cached_property
+    def model(self):
         from sentence_transformers import SentenceTransformer
 
         return SentenceTransformer(self.model_name)
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        model = self._model()
-        vectors = model.encode(texts, normalize_embeddings=True)
-        return [v.tolist() for v in vectors]
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        import numpy as np
+
+        vectors = self.model.encode(texts, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
 
-    def embed_query(self, query: str) -> list[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         return self.embed_texts([query])[0]
 
 
-def resolve_embeddings(*, openai_api_key: str | None, openai_model: str):
+def embedding_model_id(embedder) -> str:
+    """Stable identifier of the model behind `embedder` (used as a cache key)."""
+    if isinstance(embedder, OpenAIEmbeddings):
+        if embedder.dimensions:
+            return f"openai:{embedder.model}:{embedder.dimensions}"
+        return f"openai:{embedder.model}"
+    if isinstance(embedder, SentenceTransformersEmbeddings):
+        return f"sentence-transformers:{embedder.model_name}"
+    return type(embedder).__name__
+
+
+@lru_cache(maxsize=4)
+def resolve_embeddings(
+    *, openai_api_key: str | None, openai_model: str, openai_dimensions: int | None = None
+):
+    # Cached so repeated callers share one embedder (and its client or loaded model) and
+    # skip the sentence_transformers import probe.
     if openai_api_key:
-        return OpenAIEmbeddings(api_key=openai_api_key, model=openai_model), "openai"
+        embedder = OpenAIEmbeddings(
+            api_key=openai_api_key, model=openai_model, dimensions=openai_dimensions
+        )
+        return embedder, "openai"
 
     try:
         import sentence_transformers  # noqa: F401
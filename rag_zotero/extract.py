@@ -1,16 +1,18 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PageText:
     page_number: int  # 1-based
     text: str
 
 
-def extract_pdf_pages(path: Path) -> list[PageText]:
+def iter_pdf_pages(path: Path) -> Iterator[PageText]:
+    """Yield pages one at a time so only the current page's text is held in memory."""
     try:
         import fitz  # PyMuPDF
     except Exception as exc:  # pragma: no cover
@@ -18,27 +20,30 @@ def extract_pdf_pages(path: Path) -> list[PageText]:
             "Missing dependency for PDF extraction. Install `pymupdf`."
         ) from exc
 
-    pages: list[PageText] = []
     with fitz.open(str(path)) as doc:
         for i in range(doc.page_count):
             page = doc.load_page(i)
             text = page.get_text("text") or ""
-            pages.append(PageText(page_number=i + 1, text=text))
-    return pages
+            yield PageText(page_number=i + 1, text=text)
+
+
+def extract_pdf_pages(path: Path) -> list[PageText]:
+    return list(iter_pdf_pages(path))
 
 
 def extract_text_file(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="ignore")
 
 
-def extract_any(path: Path) -> tuple[list[PageText], str]:
+def iter_pages(path: Path) -> Iterator[PageText]:
     suffix = path.suffix.lower()
     if suffix == ".pdf":
-        pages = extract_pdf_pages(path)
-        full = "\n".join(p.text for p in pages)
-        return pages, full
+        return iter_pdf_pages(path)
     if suffix in {".txt", ".md"}:
-        text = extract_text_file(path)
-        return [PageText(page_number=1, text=text)], text
+        return iter([PageText(page_number=1, text=extract_text_file(path))])
     raise ValueError(f"Unsupported file type: {path}")
 
+
+def extract_any(path: Path) -> tuple[list[PageText], str]:
+    pages = list(iter_pages(path))
+    return pages, "\n".join(p.text for p in pages)
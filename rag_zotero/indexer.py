@@ -1,17 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 import hashlib
-from collections.abc import Callable
-from typing import Any
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from .extract import extract_any
+from .extract import iter_pages
 from .text_chunking import chunk_text
-from .vectorstore import get_collection
+from .vectorstore import get_collection, l2_normalize
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass(frozen=True)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True, slots=True)
 class IndexedFile:
     path: Path
     chunks_added: int
@@ -19,7 +29,8 @@ class IndexedFile:
 
 def _chunk_id(*, source_path: str, page: int, chunk_index: int) -> str:
     raw = f"{source_path}::p{page}::c{chunk_index}".encode("utf-8")
-    return hashlib.sha1(raw).hexdigest()
+    # Not security-relevant; BLAKE2b is faster than SHA-1 and 16 bytes is plenty here.
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
 
 
 def _sanitize_metadata(metadata: dict[str, Any] | None) -> dict[str, Any]:
@@ -43,46 +54,330 @@ def _sanitize_metadata(metadata: dict[str, Any] | None) -> dict[str, Any]:
     return out
 
 
-def index_file(
+def collect_chunks(
     *,
     path: Path,
-    collection,
-    embedder,
     chunk_size: int,
     chunk_overlap: int,
     extra_metadata: dict | None = None,
     status: Callable[[str], None] | None = None,
-) -> IndexedFile:
+) -> tuple[list[str], list[str], list[dict]]:
+    """Extract and chunk one file without embedding it; returns (ids, docs, metas)."""
     if status:
-        status("Extracting text")
-    pages, _full = extract_any(path)
+        status("Extracting and chunking text")
+    # Pages are streamed: each page's text is chunked and dropped before the next is read.
+    pages = iter_pages(path)
 
     ids: list[str] = []
     docs: list[str] = []
     metas: list[dict] = []
 
-    if status:
-        status("Chunking")
-    sanitized_extra_metadata = _sanitize_metadata(extra_metadata)
+    source_path = str(path)
+    base_meta = {"source_path": source_path, **_sanitize_metadata(extra_metadata)}
+    # Same ids as `_chunk_id`, but the path prefix is hashed once per file and the page
+    # prefix once per page; each chunk only copies the hasher state and adds its index.
+    file_hasher = hashlib.blake2b(f"{source_path}::p".encode("utf-8"), digest_size=16)
     for page in pages:
+        page_number = page.page_number
         chunks = chunk_text(page.text, chunk_size=chunk_size, overlap=chunk_overlap)
+        page_hasher = file_hasher.copy()
+        page_hasher.update(f"{page_number}::c".encode("ascii"))
         for chunk_index, chunk in enumerate(chunks):
-            ids.append(
-                _chunk_id(
-                    source_path=str(path),
-                    page=page.page_number,
-                    chunk_index=chunk_index,
-                )
-            )
+            hasher = page_hasher.copy()
+            hasher.update(str(chunk_index).encode("ascii"))
+            ids.append(hasher.hexdigest())
             docs.append(chunk)
-            metas.append(
-                {
-                    "source_path": str(path),
-                    "page": page.page_number,
-                    "chunk": chunk_index,
-                    **sanitized_extra_metadata,
-                }
+            meta = base_meta.copy()
+            meta["page"] = page_number
+            meta["chunk"] = chunk_index
+            metas.append(meta)
+    return ids, docs, metas
+
+
+# Per-request input cap; OpenAI allows 300k tokens per embeddings request and English
+# prose averages ~4 characters per token, so this leaves headroom for denser text.
+MAX_EMBED_BATCH_CHARS = 600_000
+
+
+def _request_slices(
+    docs: list[str], batch_size: int | None, max_chars: int
+) -> list[tuple[int, int]]:
+    slices: list[tuple[int, int]] = []
+    start = 0
+    chars = 0
+    for i, doc in enumerate(docs):
+        if i > start and (
+            (batch_size and i - start >= batch_size) or chars + len(doc) > max_chars
+        ):
+            slices.append((start, i))
+            start = i
+            chars = 0
+        chars += len(doc)
+    if start < len(docs):
+        slices.append((start, len(docs)))
+    return slices
+
+
+def embed_chunks(
+    embedder,
+    docs: list[str],
+    *,
+    batch_size: int | None = None,
+    max_chars: int = MAX_EMBED_BATCH_CHARS,
+) -> np.ndarray:
+    """Embed `docs` as unit-length vectors.
+
+    Identical texts (e.g. repeated headers/footers) are embedded once. Requests hold at most
+    `batch_size` texts and `max_chars` characters.
+    """
+    import numpy as np
+
+    positions: dict[str, int] = {}
+    order = [positions.setdefault(doc, len(positions)) for doc in docs]
+    unique = list(positions) if len(positions) < len(docs) else docs
+
+    slices = _request_slices(unique, batch_size, max_chars)
+    parts = [embedder.embed_texts(unique[start:end]) for start, end in slices]
+    if len(parts) == 1:
+        vectors = l2_normalize(parts[0])
+    else:
+        vectors = l2_normalize(np.concatenate(parts) if parts else [])
+    return vectors if unique is docs else vectors[order]
+
+
+def upsert_chunks(
+    *,
+    collection,
+    embedder,
+    ids: list[str],
+    docs: list[str],
+    metas: list[dict],
+    batch_size: int | None = None,
+) -> None:
+    embeddings = embed_chunks(embedder, docs, batch_size=batch_size)
+    collection.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=embeddings)
+
+
+@dataclass
+class _PendingBatch:
+    files: list[tuple[Path, int]] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+    docs: list[str] = field(default_factory=list)
+    metas: list[dict] = field(default_factory=list)
+    chars: int = 0
+
+
+class ChunkBatcher:
+    """Buffers chunks from several files so they are embedded in shared batches.
+
+    Files are added whole; once at least `batch_size` chunks are pending they are embedded
+    and upserted together. With `max_inflight > 1` embedding requests run on a thread pool
+    (at most `max_inflight` at once) while upserts stay on the calling thread. If a shared
+    batch fails, its files are retried one at a time so a single bad file only fails itself
+    (reported through `on_error`); a failed upsert reuses the batch's embeddings. Use as a
+    context manager, or call `close()` when done.
+    """
+
+    def __init__(
+        self,
+        *,
+        collection,
+        embedder,
+        batch_size: int = 128,
+        max_inflight: int = 1,
+        on_error: Callable[[Path, Exception], None] | None = None,
+        status: Callable[[str], None] | None = None,
+    ) -> None:
+        self.collection = collection
+        self.embedder = embedder
+        self.batch_size = max(1, int(batch_size))
+        self.max_inflight = max(1, int(max_inflight))
+        self.on_error = on_error
+        self.status = status
+        self.results: list[IndexedFile] = []
+        self._pending = _PendingBatch()
+        self._executor: ThreadPoolExecutor | None = None
+        self._inflight: dict[Future, _PendingBatch] = {}
+
+    def __enter__(self) -> ChunkBatcher:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def add(self, path: Path, ids: list[str], docs: list[str], metas: list[dict]) -> None:
+        if not docs:
+            self.results.append(IndexedFile(path=path, chunks_added=0))
+            return
+        pending = self._pending
+        pending.files.append((path, len(docs)))
+        pending.ids.extend(ids)
+        pending.docs.extend(docs)
+        pending.metas.extend(metas)
+        pending.chars += sum(len(d) for d in docs)
+        if len(pending.docs) >= self.batch_size or pending.chars >= MAX_EMBED_BATCH_CHARS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send pending chunks; with a thread pool this only blocks at the in-flight cap."""
+        batch = self._pending
+        if not batch.docs:
+            return
+        self._pending = _PendingBatch()
+
+        if self.status:
+            self.status(f"Embedding {len(batch.docs)} chunks from {len(batch.files)} file(s)")
+        if self.max_inflight == 1:
+            try:
+                embeddings = embed_chunks(self.embedder, batch.docs, batch_size=self.batch_size)
+            except Exception as exc:
+                self._retry_per_file(batch, exc)
+                return
+            self._upsert(batch, embeddings)
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_inflight, thread_name_prefix="rag-zotero-embed"
             )
+        while len(self._inflight) >= self.max_inflight:
+            self._complete(wait(self._inflight, return_when=FIRST_COMPLETED).done)
+        future = self._executor.submit(
+            embed_chunks, self.embedder, batch.docs, batch_size=self.batch_size
+        )
+        self._inflight[future] = batch
+
+    def close(self) -> None:
+        """Flush remaining chunks and wait for all in-flight embedding requests."""
+        self.flush()
+        while self._inflight:
+            self._complete(wait(self._inflight, return_when=FIRST_COMPLETED).done)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _complete(self, done: set[Future]) -> None:
+        for future in done:
+            batch = self._inflight.pop(future)
+            try:
+                embeddings = future.result()
+            except Exception as exc:
+                self._retry_per_file(batch, exc)
+                continue
+            self._upsert(batch, embeddings)
+
+    def _upsert(self, batch: _PendingBatch, embeddings: np.ndarray) -> None:
+        try:
+            self.collection.upsert(
+                ids=batch.ids, documents=batch.docs, metadatas=batch.metas, embeddings=embeddings
+            )
+        except Exception as exc:
+            self._retry_per_file(batch, exc, embeddings=embeddings)
+            return
+        self.results.extend(IndexedFile(path=p, chunks_added=n) for p, n in batch.files)
+
+    def _retry_per_file(
+        self, batch: _PendingBatch, exc: Exception, *, embeddings: np.ndarray | None = None
+    ) -> None:
+        """Upsert `batch` file by file; re-embed only if the shared embedding step failed."""
+        if len(batch.files) == 1:
+            self._fail(batch.files[0][0], exc)
+            return
+        offset = 0
+        for path, n in batch.files:
+            end = offset + n
+            try:
+                if embeddings is None:
+                    upsert_chunks(
+                        collection=self.collection,
+                        embedder=self.embedder,
+                        ids=batch.ids[offset:end],
+                        docs=batch.docs[offset:end],
+                        metas=batch.metas[offset:end],
+                        batch_size=self.batch_size,
+                    )
+                else:
+                    self.collection.upsert(
+                        ids=batch.ids[offset:end],
+                        documents=batch.docs[offset:end],
+                        metadatas=batch.metas[offset:end],
+                        embeddings=embeddings[offset:end],
+                    )
+            except Exception as file_exc:
+                self._fail(path, file_exc)
+            else:
+                self.results.append(IndexedFile(path=path, chunks_added=n))
+            offset = end
+
+    def _fail(self, path: Path, exc: Exception) -> None:
+        if self.on_error is None:
+            raise exc
+        self.on_error(path, exc)
+
+
+def prefetch_map(
+    fn: Callable[[T], R], items: Iterable[T], *, workers: int
+) -> Iterator[tuple[T, R | None, Exception | None]]:
+    """Yield `(item, fn(item), None)` or `(item, None, error)` in input order.
+
+    With `workers > 0`, `fn` runs on a thread pool up to `2 * workers` items ahead of the
+    consumer, so e.g. the next PDFs are extracted while the current batch is embedded.
+    """
+    if workers <= 0:
+        for item in items:
+            try:
+                result = fn(item)
+            except Exception as exc:
+                yield item, None, exc
+            else:
+                yield item, result, None
+        return
+
+    window: deque[tuple[T, Future]] = deque()
+    it = iter(items)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-zotero-extract") as ex:
+        try:
+            for item in it:
+                window.append((item, ex.submit(fn, item)))
+                if len(window) >= 2 * workers:
+                    break
+            while window:
+                item, future = window.popleft()
+                for nxt in it:
+                    window.append((nxt, ex.submit(fn, nxt)))
+                    break
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    yield item, None, exc
+                else:
+                    yield item, result, None
+        finally:
+            for _, future in window:
+                future.cancel()
+
+
+def index_file(
+    *,
+    path: Path,
+    collection,
+    embedder,
+    chunk_size: int,
+    chunk_overlap: int,
+    extra_metadata: dict | None = None,
+    status: Callable[[str], None] | None = None,
+) -> IndexedFile:
+    ids, docs, metas = collect_chunks(
+        path=path,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        extra_metadata=extra_metadata,
+        status=status,
+    )
 
     if not docs:
         if status:
@@ -91,11 +386,7 @@ def index_file(
 
     if status:
         status(f"Embedding {len(docs)} chunks")
-    embeddings = embedder.embed_texts(docs)
-
-    if status:
-        status("Upserting into Chroma")
-    collection.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=embeddings)
+    upsert_chunks(collection=collection, embedder=embedder, ids=ids, docs=docs, metas=metas)
     return IndexedFile(path=path, chunks_added=len(docs))
 
 
@@ -108,23 +399,37 @@ def index_files(
     chunk_size: int,
     chunk_overlap: int,
     status: Callable[[Path, str], None] | None = None,
+    embed_batch_size: int = 128,
+    max_inflight: int = 1,
+    prefetch: bool = True,
 ) -> list[IndexedFile]:
-    collection = get_collection(chroma_dir=chroma_dir, name=collection_name)
+    """Index `files`, embedding chunks from several files per request.
 
-    out: list[IndexedFile] = []
-    for path in files:
-        per_file_status = None
-        if status:
-            per_file_status = lambda msg, p=path: status(p, msg)
-        out.append(
-            index_file(
-                path=path,
-                collection=collection,
-                embedder=embedder,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                status=per_file_status,
-            )
+    With `prefetch`, the next files are extracted on one background thread while embedding
+    (never more: PyMuPDF is not thread-safe, and the embedding side never touches it), and
+    up to `max_inflight` embedding requests run concurrently.
+
+    Results are returned in the order batches complete, not necessarily in `files` order.
+    """
+    collection = get_collection(chroma_dir=chroma_dir, name=collection_name, for_indexing=True)
+
+    def collect(path: Path) -> tuple[list[str], list[str], list[dict]]:
+        return collect_chunks(
+            path=path,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            status=partial(status, path) if status else None,
         )
 
-    return out
+    with ChunkBatcher(
+        collection=collection,
+        embedder=embedder,
+        batch_size=embed_batch_size,
+        max_inflight=max_inflight,
+    ) as batcher:
+        for path, chunks, exc in prefetch_map(collect, files, workers=1 if prefetch else 0):
+            if exc is not None:
+                raise exc
+            batcher.add(path, *chunks)
+
+    return batcher.results
@@ -2,22 +2,28 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvalItem:
     idx: int
     score: float
     rationale: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EvalReport:
     provider: str
     model: str
     items: list[EvalItem]
+    # Candidate idx -> error message, for candidates whose evaluation request failed.
+    errors: dict[int, str] = field(default_factory=dict)
+
+
+_JSON_DECODER = json.JSONDecoder()
 
 
 def _extract_json_object(text: str) -> Any:
@@ -25,21 +31,14 @@ def _extract_json_object(text: str) -> Any:
         return json.loads(text)
     except Exception:
         start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1 or end <= start:
+        if start == -1:
             raise
-        return json.loads(text[start : end + 1])
+        # Parse exactly one object from the first brace; trailing prose is ignored.
+        obj, _end = _JSON_DECODER.raw_decode(text, start)
+        return obj
 
 
-def evaluate_relevance_openrouter(
-    *,
-    api_key: str,
-    model: str,
-    query: str,
-    candidates: list[dict[str, Any]],
-    insecure: bool = False,
-    timeout_s: float = 30.0,
-) -> EvalReport:
+def _openrouter_client(*, api_key: str, insecure: bool, timeout_s: float):
     from openai import OpenAI
 
     http_client = None
@@ -52,7 +51,7 @@ def evaluate_relevance_openrouter(
     if referer := (os.getenv("OPENROUTER_HTTP_REFERER") or "").strip():
         headers["HTTP-Referer"] = referer
 
-    client = OpenAI(
+    return OpenAI(
         api_key=api_key,
         base_url="https://openrouter.ai/api/v1",
         default_headers=headers,
@@ -60,24 +59,32 @@ def evaluate_relevance_openrouter(
         http_client=http_client,
     )
 
-    system = (
-        "You are a strict evaluator for retrieval results.\n"
-        "Given a user query and a list of retrieved snippets, score how well each snippet helps "
-        "answer the query.\n"
-        "Return ONLY valid JSON (no markdown) with schema:\n"
-        '{ "items": [ { "idx": <int>, "score": <float 0..1>, "rationale": <string> } ] }\n'
-        "The score result should map against the following scale: ~1.0 for directly answering, ~0.5 for tangentially useful, ~0.0 for irrelevant."
+
+_SYSTEM_PROMPT = (
+    "You are a strict evaluator for retrieval results.\n"
+    "Given a user query and a list of retrieved snippets, score how well each snippet helps "
+    "answer the query.\n"
+    "Return ONLY valid JSON (no markdown) with schema:\n"
+    '{ "items": [ { "idx": <int>, "score": <float 0..1>, "rationale": <string> } ] }\n'
+    "The score result should map against the following scale: ~1.0 for directly answering, ~0.5 for tangentially useful, ~0.0 for irrelevant."
+)
+
+
+def _user_content(query_json: str, candidates: list[dict[str, Any]]) -> str:
+    # Same text as json.dumps({"query": ..., "candidates": ...}), with the query serialized
+    # once by the caller and reused across requests.
+    return (
+        '{"query": ' + query_json
+        + ', "candidates": ' + json.dumps(candidates, ensure_ascii=False) + "}"
     )
-    user = {
-        "query": query,
-        "candidates": candidates,
-    }
 
+
+def _evaluate(client, *, model: str, user_content: str) -> list[EvalItem]:
     resp = client.chat.completions.create(
         model=model,
         messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": json.dumps(user, ensure_ascii=False)},
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": user_content},
         ],
         # extra_body={"reasoning": {"enabled": True}},
         temperature=0,
@@ -97,5 +104,69 @@ def evaluate_relevance_openrouter(
         score = float(raw.get("score"))
         rationale = str(raw.get("rationale") or "").strip()
         items.append(EvalItem(idx=idx, score=score, rationale=rationale))
+    return items
 
+
+def evaluate_relevance_openrouter(
+    *,
+    api_key: str,
+    model: str,
+    query: str,
+    candidates: list[dict[str, Any]],
+    insecure: bool = False,
+    timeout_s: float = 30.0,
+) -> EvalReport:
+    client = _openrouter_client(api_key=api_key, insecure=insecure, timeout_s=timeout_s)
+    user_content = _user_content(json.dumps(query, ensure_ascii=False), candidates)
+    items = _evaluate(client, model=model, user_content=user_content)
     return EvalReport(provider="openrouter", model=model, items=items)
+
+
+def evaluate_relevance_openrouter_parallel(
+    *,
+    api_key: str,
+    model: str,
+    query: str,
+    candidates: list[dict[str, Any]],
+    insecure: bool = False,
+    timeout_s: float = 30.0,
+    concurrency: int = 8,
+) -> EvalReport:
+    """Score each candidate in its own request (pointwise), running up to `concurrency` at once.
+
+    Candidates whose request fails have no item in the report and are listed in its
+    `errors` instead; if every request fails the first error is raised.
+    """
+    client = _openrouter_client(api_key=api_key, insecure=insecure, timeout_s=timeout_s)
+    query_json = json.dumps(query, ensure_ascii=False)
+    items: list[EvalItem] = []
+    errors: dict[int, Exception] = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as ex:
+        futures = {
+            ex.submit(
+                _evaluate, client, model=model, user_content=_user_content(query_json, [c])
+            ): c["idx"]
+            for c in candidates
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                returned = future.result()
+            except Exception as exc:
+                errors[idx] = exc
+                continue
+            if not returned:
+                errors[idx] = ValueError("OpenRouter evaluator returned no items")
+                continue
+            # One candidate per request: whatever idx the model echoes, the score is for `idx`.
+            first = returned[0]
+            items.append(EvalItem(idx=idx, score=first.score, rationale=first.rationale))
+    if errors and not items:
+        raise next(iter(errors.values()))
+    items.sort(key=lambda item: item.idx)
+    return EvalReport(
+        provider="openrouter",
+        model=model,
+        items=items,
+        errors={idx: str(exc) for idx, exc in sorted(errors.items())},
+    )
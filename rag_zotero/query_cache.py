@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import hashlib
+import sqlite3
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+QUERY_CACHE_FILENAME = "qembed.sqlite"
+
+
+def _cache_key(model: str, query: str) -> str:
+    return hashlib.sha256(f"{model}:{query}".encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """On-disk cache of query embeddings (float32), keyed by sha256(model + query)."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute("CREATE TABLE IF NOT EXISTS qembed (key TEXT PRIMARY KEY, vec BLOB)")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> QueryEmbeddingCache:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def get(self, model: str, query: str) -> np.ndarray | None:
+        """The cached float32 vector (read-only, backed by the stored blob), or None."""
+        import numpy as np
+
+        row = self._conn.execute(
+            "SELECT vec FROM qembed WHERE key = ?", (_cache_key(model, query),)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, model: str, query: str, vector) -> None:
+        import numpy as np
+
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO qembed (key, vec) VALUES (?, ?)",
+                (_cache_key(model, query), blob),
+            )
+
+
+def embed_query_cached(embedder, query: str, *, model: str, cache_dir: Path) -> np.ndarray:
+    """`embedder.embed_query(query)`, served from the on-disk cache when possible.
+
+    Cache problems (e.g. a read-only cache dir) never fail the query; they just skip caching.
+    """
+    try:
+        cache = QueryEmbeddingCache(cache_dir / QUERY_CACHE_FILENAME)
+    except (OSError, sqlite3.Error):
+        return embedder.embed_query(query)
+
+    with cache:
+        try:
+            hit = cache.get(model, query)
+        except sqlite3.Error:
+            hit = None
+        if hit is not None:
+            return hit
+        vector = embedder.embed_query(query)
+        try:
+            cache.put(model, query, vector)
+        except sqlite3.Error:
+            pass
+        return vector
@@ -5,7 +5,7 @@ def chunk_text(text: str, *, chunk_size: int, overlap: int) -> list[str]:
     text = (text or "").strip()
     if not text:
         return []
-    if chunk_size <= 0:
+    if chunk_size <= 0 or len(text) <= chunk_size:
         return [text]
     if overlap < 0:
         overlap = 0
@@ -13,13 +13,17 @@ def chunk_text(text: str, *, chunk_size: int, overlap: int) -> list[str]:
         overlap = max(0, chunk_size // 4)
 
     chunks: list[str] = []
+    n = len(text)
     start = 0
-    while start < len(text):
-        end = min(len(text), start + chunk_size)
-        chunk = text[start:end].strip()
+    while start < n:
+        end = min(n, start + chunk_size)
+        chunk = text[start:end]
+        # Only re-strip when a window edge actually lands on whitespace.
+        if text[start].isspace() or text[end - 1].isspace():
+            chunk = chunk.strip()
         if chunk:
             chunks.append(chunk)
-        if end >= len(text):
+        if end >= n:
             break
         start = max(0, end - overlap)
     return chunks
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass(frozen=True)
+
+# Scheme used to derive chunk ids (see `indexer._chunk_id`), recorded in each collection's
+# metadata. Ids from another scheme never match, so indexing into such a collection would
+# store a second copy of every chunk.
+CHUNK_ID_SCHEME = "blake2b16"
+CHUNK_ID_SCHEME_KEY = "rag_zotero_ids"
+
+
+@dataclass(frozen=True, slots=True)
 class SearchResult:
     id: str
     score: float
@@ -13,32 +24,81 @@ class SearchResult:
     metadata: dict[str, Any]
 
 
-def get_collection(*, chroma_dir: Path, name: str):
+def l2_normalize(vectors):
+    """Scale a vector (or each row of a matrix) to unit length; zero vectors are left as-is."""
+    import numpy as np
+
+    arr = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+@lru_cache(maxsize=4)
+def _client(path: str):
+    # Opening a PersistentClient loads the SQLite db and index segments; do it once per dir.
     import chromadb
 
-    chroma_dir.mkdir(parents=True, exist_ok=True)
-    client = chromadb.PersistentClient(path=str(chroma_dir))
-    return client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+    Path(path).mkdir(parents=True, exist_ok=True)
+    return chromadb.PersistentClient(path=path)
+
 
+def close_clients() -> None:
+    """Forget cached clients (e.g. after deleting a Chroma dir in tests)."""
+    _client.cache_clear()
 
-def query_collection(collection, query_embedding: list[float], *, n_results: int) -> list[SearchResult]:
-    res = collection.query(query_embeddings=[query_embedding], n_results=n_results)
+
+def get_collection(*, chroma_dir: Path, name: str, for_indexing: bool = False):
+    """Open (or create) collection `name`.
+
+    With `for_indexing`, the collection must use `CHUNK_ID_SCHEME`: an empty collection
+    without the marker is recreated with it, and a non-empty one raises RuntimeError.
+    """
+    from chromadb.errors import ChromaError
+
+    client = _client(str(chroma_dir))
+    # Embeddings are L2-normalized before upsert and query, so inner product equals cosine
+    # similarity without HNSW re-normalizing every vector. The space is only set when a
+    # collection is created; existing (cosine) collections give the same scores.
+    metadata = {"hnsw:space": "ip", CHUNK_ID_SCHEME_KEY: CHUNK_ID_SCHEME}
+    # Open before creating: chromadb 0.5.x `get_or_create_collection` overwrites an existing
+    # collection's metadata (its marker and `hnsw:space`).
+    try:
+        collection = client.get_collection(name=name)
+    except (ValueError, ChromaError):
+        return client.create_collection(name=name, metadata=metadata)
+    if not for_indexing or (collection.metadata or {}).get(CHUNK_ID_SCHEME_KEY) == CHUNK_ID_SCHEME:
+        return collection
+    if collection.count() == 0:
+        # Nothing to keep; recreating is the portable way to set the marker.
+        client.delete_collection(name=name)
+        return client.create_collection(name=name, metadata=metadata)
+    raise RuntimeError(
+        f"Collection {name!r} in {chroma_dir} was built with a different chunk id scheme; "
+        "indexing into it would duplicate every chunk. Re-index into a fresh collection "
+        "(set CHROMA_COLLECTION or CHROMA_DIR)."
+    )
+
+
+def query_collection(
+    collection, query_embedding: np.ndarray, *, n_results: int
+) -> list[SearchResult]:
+    # Older chromadb releases (0.5.x) only accept plain-list rows in `query_embeddings`.
+    res = collection.query(query_embeddings=[query_embedding.tolist()], n_results=n_results)
     ids = (res.get("ids") or [[]])[0]
     docs = (res.get("documents") or [[]])[0]
     metadatas = (res.get("metadatas") or [[]])[0]
     distances = (res.get("distances") or [[]])[0]
 
-    out: list[SearchResult] = []
-    for i in range(len(ids)):
-        distance = float(distances[i]) if distances and distances[i] is not None else 0.0
-        score = 1.0 - distance
-        out.append(
-            SearchResult(
-                id=str(ids[i]),
-                score=score,
-                document=str(docs[i]),
-                metadata=dict(metadatas[i] or {}),
-            )
+    if not distances:
+        distances = [None] * len(ids)
+    # Chroma returns fresh str ids/documents and metadata dicts; use them as-is.
+    return [
+        SearchResult(
+            id=id_,
+            score=1.0 - (float(distance) if distance is not None else 0.0),
+            document=doc if doc is not None else "",
+            metadata=meta or {},
         )
-    return out
-
+        for id_, doc, meta, distance in zip(ids, docs, metadatas, distances)
+    ]
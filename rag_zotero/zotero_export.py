@@ -1,243 +1,450 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
+import hashlib
 import json
+import os
+import pickle
 import re
-from typing import Any
+import string
+import sys
+from typing import Any, BinaryIO
 
 
-_YEAR_RE = re.compile(r"(?P<year>\d{4})")
-_ZOTERO_STORAGE_KEY_RE = re.compile(r"(?:^|[\\\\/])storage[\\\\/](?P<key>[A-Z0-9]{8})(?:[\\\\/]|$)")
+# Bump whenever parsing or the index layout changes so cached exports are rebuilt.
+_EXPORT_CACHE_VERSION = 7
 
+_YEAR_RE = re.compile(r"\d{4}")
+_STORAGE_KEY_CHARS = string.ascii_uppercase + string.digits
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class ZoteroItem:
     key: str
     item_type: str
     title: str | None
-    creators: list[str]
+    creators: tuple[str, ...]
     year: int | None
     doi: str | None
     url: str | None
     citekey: str | None
+    creators_str: str | None = None  # "; "-joined `creators`, as stored in chunk metadata
+
+
+# Row layout of `ZoteroExportIndex.item_rows`: ZoteroItem's fields after `key`.
+ItemRow = tuple[
+    str, str | None, tuple[str, ...], int | None, str | None, str | None, str | None, str | None
+]
+
+
+class _ItemsView(Mapping[str, ZoteroItem]):
+    """Read-only key -> ZoteroItem mapping over `item_rows`; items are built per lookup."""
+
+    __slots__ = ("_rows",)
+
+    def __init__(self, rows: dict[str, ItemRow]) -> None:
+        self._rows = rows
+
+    def __getitem__(self, key: str) -> ZoteroItem:
+        return ZoteroItem(key, *self._rows[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rows)
 
+    def __len__(self) -> int:
+        return len(self._rows)
 
-@dataclass(frozen=True)
+    def __contains__(self, key: object) -> bool:
+        return key in self._rows
+
+
+@dataclass(frozen=True, slots=True)
 class ZoteroExportIndex:
-    items_by_key: dict[str, ZoteroItem]
+    # One plain tuple per item instead of a ZoteroItem object: cheaper to build and pickle.
+    item_rows: dict[str, ItemRow]
     attachment_to_parent: dict[str, str]  # attachmentKey -> parentItemKey
+    _items_view: _ItemsView = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_items_view", _ItemsView(self.item_rows))
+
+    @property
+    def items_by_key(self) -> Mapping[str, ZoteroItem]:
+        """Read-only ZoteroItem view of `item_rows` (created once, not a copy)."""
+        return self._items_view
+
+    def item(self, key: str) -> ZoteroItem | None:
+        """The item with `key` as a ZoteroItem view; iterate `item_rows` for bulk access."""
+        row = self.item_rows.get(key)
+        return ZoteroItem(key, *row) if row is not None else None
 
     def metadata_for_attachment(self, attachment_key: str) -> dict[str, Any]:
         meta: dict[str, Any] = {"attachment_key": attachment_key}
         parent_key = self.attachment_to_parent.get(attachment_key)
         if parent_key:
             meta["item_key"] = parent_key
-        item = self.items_by_key.get(parent_key or "")
-        if not item:
+        row = self.item_rows.get(parent_key or "")
+        if row is None:
             return meta
 
-        creators = "; ".join([c for c in item.creators if str(c).strip()]).strip() or None
-        meta.update(
-            {
-                "title": item.title,
-                "creators": creators,
-                "year": item.year,
-                "doi": item.doi,
-                "url": item.url,
-                "citekey": item.citekey,
-            }
-        )
+        _item_type, title, _creators, year, doi, url, citekey, creators_str = row
+        meta["title"] = title
+        meta["creators"] = creators_str
+        meta["year"] = year
+        meta["doi"] = doi
+        meta["url"] = url
+        meta["citekey"] = citekey
         return meta
 
 
-def _as_list(payload: Any) -> list[dict[str, Any]]:
-    if isinstance(payload, list):
-        return [x for x in payload if isinstance(x, dict)]
-    if isinstance(payload, dict):
-        items = payload.get("items")
-        if isinstance(items, list):
-            return [x for x in items if isinstance(x, dict)]
-    raise ValueError("Unsupported Zotero export structure (expected list or {'items': [...]})")
+def _iter_payload_rows(payload: Any) -> Iterator[dict[str, Any]]:
+    """Dict rows of a parsed export, lazily; the structure itself is checked up front."""
+    rows = payload.get("items") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise ValueError("Unsupported Zotero export structure (expected list or {'items': [...]})")
+    # No filtered copy of a possibly huge list.
+    return (row for row in rows if isinstance(row, dict))
 
 
 def _creator_to_str(c: dict[str, Any]) -> str | None:
-    name = (c.get("name") or "").strip()
-    if name:
-        return name
-    first = (c.get("firstName") or "").strip()
-    last = (c.get("lastName") or "").strip()
-    full = " ".join([p for p in [first, last] if p]).strip()
-    return full or None
-
-
+    get = c.get
+    name = get("name")
+    if type(name) is str:
+        name = name.strip()
+        if name:
+            return name
+    first = get("firstName")
+    first = first.strip() if type(first) is str else ""
+    last = get("lastName")
+    last = last.strip() if type(last) is str else ""
+    if first and last:
+        return f"{first} {last}"
+    return first or last or None
+
+
+# Cached: items from the same issue or year often carry identical date strings.
+@lru_cache(maxsize=2048)
 def _extract_year(raw: str | None) -> int | None:
     if not raw:
         return None
     m = _YEAR_RE.search(raw)
-    if not m:
-        return None
-    try:
-        return int(m.group("year"))
-    except Exception:
-        return None
+    return int(m.group(0)) if m else None
 
 
 def _extract_year_any(value: Any) -> int | None:
-    if value is None:
-        return None
-    if isinstance(value, int):
-        return value if 1000 <= value <= 9999 else None
-    if isinstance(value, str):
-        return _extract_year(value)
-    if isinstance(value, dict):
-        date_parts = value.get("date-parts") or value.get("dateParts")
-        if (
-            isinstance(date_parts, list)
-            and date_parts
-            and isinstance(date_parts[0], list)
-            and date_parts[0]
-        ):
-            return _extract_year_any(date_parts[0][0])
-        raw = value.get("raw") or value.get("literal")
-        if isinstance(raw, str):
-            return _extract_year(raw)
+    # Iterative: nested CSL values (`{"date-parts": [[2020, 1]]}`, `[["2020"]]`) just
+    # descend to their first element. Exact type checks are enough for decoded JSON.
+    while True:
+        t = type(value)
+        if t is str:
+            return _extract_year(value)
+        if t is int:
+            return value if 1000 <= value <= 9999 else None
+        if t is dict:
+            date_parts = value.get("date-parts") or value.get("dateParts")
+            if type(date_parts) is list and date_parts:
+                first = date_parts[0]
+                if type(first) is list and first:
+                    value = first[0]
+                    continue
+            raw = value.get("raw") or value.get("literal")
+            return _extract_year(raw) if type(raw) is str else None
+        if t is list and value:
+            first = value[0]
+            if type(first) is list:
+                if not first:
+                    return None
+                first = first[0]
+            value = first
+            continue
         return None
-    if isinstance(value, list) and value:
-        if isinstance(value[0], list):
-            return _extract_year_any(value[0][0] if value[0] else None)
-        return _extract_year_any(value[0])
-    return None
 
 
 def _attachment_key_from_path_field(path_field: str | None) -> str | None:
     if not path_field:
         return None
+    return _parse_attachment_path(path_field)
+
+
+# Cached: an item's PDF, snapshots and annotations often repeat the same path strings.
+@lru_cache(maxsize=4096)
+def _parse_attachment_path(path_field: str) -> str | None:
     # Common in Zotero exports: "storage:ABCD1234/foo.pdf"
     if path_field.startswith("storage:"):
         rest = path_field[len("storage:") :]
         key = rest.split("/", 1)[0].strip()
         return key or None
-    # Some exports store absolute paths and include ".../storage/ABCD1234/...".
-    m = _ZOTERO_STORAGE_KEY_RE.search(path_field)
-    if m:
-        return m.group("key").strip() or None
+    # Some exports store absolute paths and include ".../storage/ABCD1234/...": a
+    # `storage` path segment followed by an 8-character [A-Z0-9] key segment.
+    pos = path_field.find("storage")
+    while pos >= 0:
+        key = path_field[pos + 8 : pos + 16]
+        if (
+            (pos == 0 or path_field[pos - 1] in "\\/")
+            and path_field[pos + 7 : pos + 8] in ("\\", "/")
+            and len(key) == 8
+            and not key.strip(_STORAGE_KEY_CHARS)
+            and path_field[pos + 16 : pos + 17] in ("", "\\", "/")
+        ):
+            return key
+        pos = path_field.find("storage", pos + 7)
+    return None
+
+
+def _clean_str(value: Any) -> str | None:
+    # JSON decoders only produce exact `str`, so the cheaper identity check is enough.
+    if type(value) is str:
+        return value.strip() or None
+    return None
+
+
+def _first_str(d: dict[str, Any], *keys: str) -> str | None:
+    """First non-blank string among `d[key]` for `keys`, stripped."""
+    for k in keys:
+        v = d.get(k)
+        if type(v) is str:
+            v = v.strip()
+            if v:
+                return v
     return None
 
 
 def _row_fields(row: dict[str, Any]) -> dict[str, Any]:
     data = row.get("data")
-    return data if isinstance(data, dict) else row
+    return data if type(data) is dict else row
 
 
 def _row_key(row: dict[str, Any], fields: dict[str, Any]) -> str:
     return str(row.get("key") or row.get("itemKey") or fields.get("key") or fields.get("itemKey") or "").strip()
 
 
-def load_zotero_export(path: Path) -> ZoteroExportIndex:
-    # print(f"Loading {path}, exists:{path.exists()}")
+def _fast_loads() -> Callable[[bytes], Any] | None:
+    # Optional C decoders that parse bytes directly, several times faster than json.
+    try:
+        import orjson
+
+        return orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+
+        return ujson.loads
+    except ImportError:
+        return None
+
+
+def _read_rows(path: Path) -> Iterator[dict[str, Any]]:
+    loads = _fast_loads()
+    if loads is not None:
+        try:
+            payload = loads(path.read_bytes())
+        except ValueError:
+            pass  # e.g. invalid UTF-8; fall back to the lenient decode below
+        else:
+            return _iter_payload_rows(payload)
     payload = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
-    rows = _as_list(payload)
+    return _iter_payload_rows(payload)
+
+
+def _first_non_ws_byte(fh: BinaryIO) -> bytes:
+    while True:
+        block = fh.read(4096)
+        if not block:
+            return b""
+        stripped = block.lstrip()
+        if stripped:
+            return stripped[:1]
+
+
+def _iter_rows_streaming(path: Path, ijson) -> Iterator[dict[str, Any]]:
+    """Yield export rows one at a time with ijson instead of parsing the whole file."""
+    with path.open("rb") as fh:
+        is_list = _first_non_ws_byte(fh) == b"["
+        fh.seek(0)
+        streamed = 0
+        for row in ijson.items(fh, "item" if is_list else "items.item", use_float=True):
+            if isinstance(row, dict):
+                streamed += 1
+                yield row
+    if not is_list and not streamed:
+        # Either an empty/odd `{"items": ...}` or an unsupported shape: let
+        # _iter_payload_rows decide.
+        yield from _read_rows(path)
+
+
+def _load_export(path: Path) -> ZoteroExportIndex:
+    try:
+        import ijson
+    except ImportError:  # optional: stream large exports instead of loading them whole
+        ijson = None
+
+    if ijson is not None:
+        try:
+            return _build_index(_iter_rows_streaming(path, ijson))
+        except ijson.JSONError:
+            pass  # e.g. invalid UTF-8; the lenient full parse below copes with it
+    return _build_index(_read_rows(path))
+
+
+def _export_cache_file(path: Path, cache_dir: Path) -> Path:
+    digest = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return cache_dir / f"export_{digest}.pkl"
+
 
-    items_by_key: dict[str, ZoteroItem] = {}
+def load_zotero_export(path: Path, *, cache_dir: Path | None = None) -> ZoteroExportIndex:
+    """Load a Zotero/BetterBibTeX JSON export.
+
+    With `cache_dir`, the parsed index is pickled there and reused while the export's
+    mtime and size are unchanged.
+    """
+    if cache_dir is None:
+        return _load_export(path)
+
+    stat = path.stat()
+    stamp = (_EXPORT_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache_file = _export_cache_file(path, cache_dir)
+    try:
+        with cache_file.open("rb") as fh:
+            cached_stamp, cached_index = pickle.load(fh)
+        if cached_stamp == stamp and isinstance(cached_index, ZoteroExportIndex):
+            return cached_index
+    except Exception:
+        pass  # missing, stale or unreadable cache: parse again
+
+    index = _load_export(path)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        with tmp.open("wb") as fh:
+            pickle.dump((stamp, index), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_file)
+    except OSError:
+        pass
+    return index
+
+
+def load_zotero_export_payload(payload: Any) -> ZoteroExportIndex:
+    """Build the index from an already-parsed export (a list or `{"items": [...]}`)."""
+    return _build_index(_iter_payload_rows(payload))
+
+
+def _build_index(rows: Iterable[dict[str, Any]]) -> ZoteroExportIndex:
+    item_rows: dict[str, ItemRow] = {}
     attachment_to_parent: dict[str, str] = {}
 
+    # Locals instead of global/attribute lookups on every row.
+    set_item = item_rows.__setitem__
+    set_parent = attachment_to_parent.__setitem__
+    update_parents = attachment_to_parent.update
+    clean_str = _clean_str
+    first_str = _first_str
+    creator_to_str = _creator_to_str
+    extract_year = _extract_year_any
+    key_from_path = _attachment_key_from_path_field
+    # Item keys recur as parent/attachment links and item types come from a small
+    # vocabulary; interning shares one string object per distinct value.
+    intern = sys.intern
+
     for row in rows:
         fields = _row_fields(row)
         key = _row_key(row, fields)
         if not key:
             continue
+        key = intern(key)
 
-        item_type = str(fields.get("itemType") or "").strip()
-        title = fields.get("title")
-        if isinstance(title, str):
-            title = title.strip() or None
-        else:
-            title = None
+        get = fields.get
+        item_type = intern(str(get("itemType") or "").strip())
+        title = clean_str(get("title"))
 
-        creators_raw = fields.get("creators")
+        creators_raw = get("creators")
         creators: list[str] = []
-        if isinstance(creators_raw, list):
+        if type(creators_raw) is list:
             for c in creators_raw:
-                if isinstance(c, dict):
-                    s = _creator_to_str(c)
+                if type(c) is dict:
+                    s = creator_to_str(c)
                     if s:
                         creators.append(s)
 
-        doi = fields.get("DOI") or fields.get("doi")
-        doi = doi.strip() if isinstance(doi, str) and doi.strip() else None
-
-        url = fields.get("url") or fields.get("URL")
-        url = url.strip() if isinstance(url, str) and url.strip() else None
-
-        citekey = fields.get("citekey") or fields.get("citationKey")
-        citekey = citekey.strip() if isinstance(citekey, str) and citekey.strip() else None
-
-        year = _extract_year_any(fields.get("date") or fields.get("issued"))
-
-        items_by_key[key] = ZoteroItem(
-            key=key,
-            item_type=item_type,
-            title=title,
-            creators=creators,
-            year=year,
-            doi=doi,
-            url=url,
-            citekey=citekey,
-        )
-
-        parent = str(
-            fields.get("parentItem")
-            or fields.get("parentItemKey")
-            or row.get("parentItem")
-            or row.get("parentItemKey")
-            or ""
-        ).strip()
+        doi = first_str(fields, "DOI", "doi")
+        url = first_str(fields, "url", "URL")
+        citekey = first_str(fields, "citekey", "citationKey")
+        year = extract_year(get("date") or get("issued"))
+
+        # Creator names are already stripped and non-empty, so joining them is enough.
+        creators_str = "; ".join(creators) or None
+        set_item(key, (item_type, title, tuple(creators), year, doi, url, citekey, creators_str))
+
+        path_field = get("path")
+        if type(path_field) is not str:
+            path_field = None
+        parent = first_str(fields, "parentItem", "parentItemKey")
+        if not parent and fields is not row:
+            parent = first_str(row, "parentItem", "parentItemKey")
+        if parent:
+            parent = intern(parent)
         if parent and (
             item_type == "attachment"
-            or isinstance(fields.get("path"), str)
-            or isinstance(fields.get("filename"), str)
-            or isinstance(fields.get("mimeType"), str)
+            or path_field is not None
+            or type(get("filename")) is str
+            or type(get("mimeType")) is str
         ):
-            attachment_to_parent[key] = parent
+            set_parent(key, parent)
 
-        attachments = fields.get("attachments")
-        if isinstance(attachments, list):
+        attachments = get("attachments")
+        if type(attachments) is list:
+            att_keys: list[str] = []
+            add_att = att_keys.append
             for att in attachments:
-                if isinstance(att, str):
-                    att_key = _attachment_key_from_path_field(att)
+                if type(att) is str:
+                    att_key = key_from_path(att)
                     if att_key:
-                        attachment_to_parent[att_key] = key
+                        add_att(intern(att_key))
                     continue
-                if not isinstance(att, dict):
+                if type(att) is not dict:
                     continue
-                att_key = (
-                    str(att.get("key") or att.get("itemKey") or "").strip()
-                    or _attachment_key_from_path_field(
-                        att.get("path") if isinstance(att.get("path"), str) else None
-                    )
-                    or _attachment_key_from_path_field(
-                        att.get("localPath") if isinstance(att.get("localPath"), str) else None
-                    )
-                    or _attachment_key_from_path_field(
-                        att.get("file") if isinstance(att.get("file"), str) else None
-                    )
-                )
+                att_get = att.get
+                att_key = str(att_get("key") or att_get("itemKey") or "").strip()
+                if not att_key:
+                    for name in ("path", "localPath", "file"):
+                        value = att_get(name)
+                        if type(value) is str:
+                            att_key = key_from_path(value)
+                            if att_key:
+                                break
                 if att_key:
-                    attachment_to_parent[att_key] = key
+                    add_att(intern(att_key))
+            if att_keys:
+                # One C-level update for all of this item's attachment links.
+                update_parents(zip(att_keys, repeat(key)))
 
-        attachment_key = _attachment_key_from_path_field(
-            fields.get("path") if isinstance(fields.get("path"), str) else None
-        )
-        if attachment_key and item_type == "attachment" and parent:
-            attachment_to_parent[attachment_key] = parent
+        if item_type == "attachment" and parent:
+            attachment_key = key_from_path(path_field)
+            if attachment_key:
+                set_parent(intern(attachment_key), parent)
 
-    return ZoteroExportIndex(items_by_key=items_by_key, attachment_to_parent=attachment_to_parent)
+    return ZoteroExportIndex(item_rows=item_rows, attachment_to_parent=attachment_to_parent)
+
+
+# The cwd is part of both cache keys: relative paths resolve against it.
+@lru_cache(maxsize=None)
+def _resolved_storage_dir(storage_dir: Path, _cwd: str) -> Path:
+    return storage_dir.expanduser().resolve()
 
 
 def attachment_key_from_storage_path(*, file_path: Path, storage_dir: Path) -> str | None:
+    return _attachment_key(file_path, storage_dir, os.getcwd())
+
+
+# Cached: scan/index look up the same files repeatedly and `resolve()` hits the filesystem.
+@lru_cache(maxsize=None)
+def _attachment_key(file_path: Path, storage_dir: Path, cwd: str) -> str | None:
     try:
-        rel = file_path.resolve().relative_to(storage_dir.expanduser().resolve())
+        rel = file_path.resolve().relative_to(_resolved_storage_dir(storage_dir, cwd))
     except Exception:
         return None
     parts = rel.parts
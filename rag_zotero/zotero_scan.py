@@ -1,25 +1,229 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+import hashlib
+import json
+import os
 
 
 DEFAULT_EXTENSIONS = {".pdf", ".txt", ".md"}
 
+NETWORK_SCAN_WORKERS = 16
+LOCAL_SCAN_WORKERS = 8
+# Below this many top-level folders a parallel scan is not worth the thread start-up.
+PARALLEL_SCAN_MIN_SUBDIRS = 16
+_NETWORK_FS_TYPES = {
+    "9p",
+    "afpfs",
+    "cifs",
+    "davfs",
+    "fuse.rclone",
+    "fuse.sshfs",
+    "ncpfs",
+    "nfs",
+    "nfs4",
+    "smb3",
+    "smbfs",
+    "sshfs",
+    "webdav",
+}
 
-def scan_storage(storage_dir: Path, *, extensions: set[str] | None = None) -> list[Path]:
+
+def _mount_fs_type(path: Path) -> str | None:
+    """Filesystem type of the mount containing `path` (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as fh:
+            mounts = [line.split()[1:3] for line in fh if line.strip()]
+    except OSError:
+        return None
+    target = str(path)
+    best: tuple[int, str] | None = None
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        prefix = mount_point.rstrip("/") + "/"
+        if target == mount_point or target.startswith(prefix):
+            if best is None or len(mount_point) > best[0]:
+                best = (len(mount_point), fs_type)
+    return best[1] if best else None
+
+
+def default_scan_workers(storage_dir: Path) -> int:
+    """Many threads on network mounts, where each listing waits on RTT; up to 8 locally."""
+    if _mount_fs_type(storage_dir) in _NETWORK_FS_TYPES:
+        return NETWORK_SCAN_WORKERS
+    return min(LOCAL_SCAN_WORKERS, os.cpu_count() or 1)
+
+
+def _has_ext(name: str, exts: tuple[str, ...]) -> bool:
+    # Path.suffix semantics: a bare ".pdf" has no suffix.
+    name = name.lower()
+    return name.endswith(exts) and "." in name[1:]
+
+
+def _list_dir(path: str, exts: tuple[str, ...]) -> tuple[list[str], list[os.DirEntry]]:
+    # Mirrors Path.rglob: do not descend into symlinked dirs, but accept symlinked files.
+    # The name is checked before `is_file()`, which may need a stat (e.g. for symlinks).
+    subdirs: list[str] = []
+    files: list[os.DirEntry] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif _has_ext(entry.name, exts) and entry.is_file():
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return subdirs, files
+
+
+def _walk(roots: list[str], exts: tuple[str, ...]) -> Iterator[os.DirEntry]:
+    stack = list(roots)
+    while stack:
+        subdirs, files = _list_dir(stack.pop(), exts)
+        stack.extend(subdirs)
+        yield from files
+
+
+def _walk_all(roots: list[str], exts: tuple[str, ...]) -> list[os.DirEntry]:
+    return list(_walk(roots, exts))
+
+
+def _split_groups(paths: list[str], workers: int) -> list[list[str]]:
+    # A few groups per worker keeps the pool busy without one future per directory.
+    n_groups = min(len(paths), workers * 4)
+    return [paths[i::n_groups] for i in range(n_groups)]
+
+
+def iter_storage(
+    storage_dir: Path, *, extensions: set[str] | None = None, workers: int = 1
+) -> Iterator[os.DirEntry]:
+    """Yield matching files (unsorted).
+
+    With `workers > 1` and at least `PARALLEL_SCAN_MIN_SUBDIRS` top-level folders (one per
+    Zotero attachment), the folders are split into groups walked on a thread pool, which
+    overlaps the per-listing latency of network filesystems and slow disks.
+    """
+    exts = tuple(sorted({e.lower() for e in (extensions or DEFAULT_EXTENSIONS)}))
+
+    subdirs, files = _list_dir(str(storage_dir), exts)
+    yield from files
+    if workers <= 1 or len(subdirs) < PARALLEL_SCAN_MIN_SUBDIRS:
+        yield from _walk(subdirs, exts)
+        return
+
+    groups = _split_groups(subdirs, workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-zotero-scan") as ex:
+        for future in as_completed([ex.submit(_walk_all, group, exts) for group in groups]):
+            yield from future.result()
+
+
+def _scan_cache_file(storage_dir: Path, exts: list[str], cache_dir: Path) -> Path:
+    raw = "\0".join([str(storage_dir), *exts])
+    return cache_dir / f"scan_{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+def _dir_mtimes(paths: list[str]) -> list[tuple[str, int]]:
+    mtimes: list[tuple[str, int]] = []
+    for path in paths:
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            continue
+        mtimes.append((os.path.basename(path), st.st_mtime_ns))
+    return mtimes
+
+
+def _storage_stamp(storage_dir: Path, *, workers: int = 1) -> dict[str, int]:
+    """mtimes of `storage_dir` and of each top-level (per-attachment) folder in it.
+
+    A folder's mtime changes when files are added, removed or renamed directly inside it,
+    which covers Zotero's flat attachment folders without listing every file. The folders
+    are stat'ed in the same groups and on the same kind of pool as `iter_storage`.
+    """
+    stamp = {".": storage_dir.stat().st_mtime_ns}
+    subdirs, _files = _list_dir(str(storage_dir), ())
+    if workers <= 1 or len(subdirs) < PARALLEL_SCAN_MIN_SUBDIRS:
+        stamp.update(_dir_mtimes(subdirs))
+        return stamp
+
+    groups = _split_groups(subdirs, workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-zotero-scan") as ex:
+        for mtimes in ex.map(_dir_mtimes, groups):
+            stamp.update(mtimes)
+    return stamp
+
+
+def _read_scan_cache(cache_file: Path, stamp: dict[str, int]) -> list[Path] | None:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("stamp") != stamp:
+        return None
+    files = data.get("files")
+    if not isinstance(files, list):
+        return None
+    return [Path(f) for f in files]
+
+
+def _write_scan_cache(cache_file: Path, stamp: dict[str, int], files: list[Path]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"stamp": stamp, "files": [str(p) for p in files]}),
+            encoding="utf-8",
+        )
+        tmp.replace(cache_file)
+    except OSError:
+        pass
+
+
+def scan_storage(
+    storage_dir: Path,
+    *,
+    extensions: set[str] | None = None,
+    workers: int | None = None,
+    cache_dir: Path | None = None,
+) -> list[Path]:
+    """Sorted list of files under `storage_dir` with one of `extensions`.
+
+    With `cache_dir`, the result is cached and reused while the mtimes of `storage_dir`
+    and of each attachment folder directly in it are unchanged (one stat per folder instead
+    of listing every file, spread over `workers` threads like the walk). Adding, removing or
+    renaming attachments or the files in their folders invalidates the cache. Changes in
+    nested subfolders, and changes within the filesystem's mtime granularity, do not, so
+    the cache is opt-in (`--scan-cache`).
+    """
     storage_dir = storage_dir.expanduser().resolve()
     if not storage_dir.exists():
         raise FileNotFoundError(storage_dir)
     if not storage_dir.is_dir():
         raise NotADirectoryError(storage_dir)
 
-    exts = {e.lower() for e in (extensions or DEFAULT_EXTENSIONS)}
-    results: list[Path] = []
-    for path in storage_dir.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() in exts:
-            results.append(path)
+    if workers is None:
+        workers = default_scan_workers(storage_dir)
+
+    cache_file = None
+    stamp: dict[str, int] = {}
+    if cache_dir is not None:
+        exts = sorted({e.lower() for e in (extensions or DEFAULT_EXTENSIONS)})
+        cache_file = _scan_cache_file(storage_dir, exts, cache_dir)
+        stamp = _storage_stamp(storage_dir, workers=workers)
+        cached = _read_scan_cache(cache_file, stamp)
+        if cached is not None:
+            return cached
+    results = [
+        Path(entry.path)
+        for entry in iter_storage(storage_dir, extensions=extensions, workers=workers)
+    ]
     results.sort()
+    if cache_file is not None:
+        _write_scan_cache(cache_file, stamp, results)
     return results
-
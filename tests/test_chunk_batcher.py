@@ -0,0 +1,195 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from rag_zotero.indexer import (
+    ChunkBatcher,
+    _chunk_id,
+    collect_chunks,
+    embed_chunks,
+    index_files,
+    prefetch_map,
+)
+from rag_zotero.vectorstore import close_clients
+
+
+class _FakeEmbedder:
+    def __init__(self, fail_on: str | None = None) -> None:
+        self.calls: list[list[str]] = []
+        self.fail_on = fail_on
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        if self.fail_on and self.fail_on in texts:
+            raise RuntimeError("boom")
+        return [[float(len(t))] for t in texts]
+
+
+class _FakeCollection:
+    def __init__(self, fail_on: str | None = None) -> None:
+        self.ids: list[str] = []
+        self.fail_on = fail_on
+
+    def upsert(self, *, ids, documents, metadatas, embeddings) -> None:
+        if self.fail_on and self.fail_on in ids:
+            raise RuntimeError("store boom")
+        self.ids.extend(ids)
+
+
+def _chunks(name: str, n: int) -> tuple[list[str], list[str], list[dict]]:
+    ids = [f"{name}-{i}" for i in range(n)]
+    return ids, [f"{name} text {i}" for i in range(n)], [{"chunk": i} for i in range(n)]
+
+
+class TestChunkBatcher(unittest.TestCase):
+    def test_batches_chunks_across_files(self) -> None:
+        embedder = _FakeEmbedder()
+        collection = _FakeCollection()
+        batcher = ChunkBatcher(collection=collection, embedder=embedder, batch_size=5)
+        batcher.add(Path("a.pdf"), *_chunks("a", 2))
+        batcher.add(Path("b.pdf"), *_chunks("b", 1))
+        self.assertEqual(embedder.calls, [])
+        batcher.add(Path("c.pdf"), *_chunks("c", 2))
+        batcher.add(Path("d.pdf"), *_chunks("d", 0))
+        batcher.flush()
+
+        self.assertEqual(len(embedder.calls), 1)
+        self.assertEqual(len(collection.ids), 5)
+        self.assertEqual(
+            [(r.path.name, r.chunks_added) for r in batcher.results],
+            [("a.pdf", 2), ("b.pdf", 1), ("c.pdf", 2), ("d.pdf", 0)],
+        )
+
+    def test_failed_batch_is_retried_per_file(self) -> None:
+        embedder = _FakeEmbedder(fail_on="b text 0")
+        collection = _FakeCollection()
+        errors: list[Path] = []
+        batcher = ChunkBatcher(
+            collection=collection,
+            embedder=embedder,
+            batch_size=10,
+            on_error=lambda p, exc: errors.append(p),
+        )
+        batcher.add(Path("a.pdf"), *_chunks("a", 2))
+        batcher.add(Path("b.pdf"), *_chunks("b", 2))
+        batcher.flush()
+
+        self.assertEqual(errors, [Path("b.pdf")])
+        self.assertEqual(collection.ids, ["a-0", "a-1"])
+        self.assertEqual([r.path.name for r in batcher.results], ["a.pdf"])
+
+    def test_failed_upsert_is_retried_without_reembedding(self) -> None:
+        embedder = _FakeEmbedder()
+        collection = _FakeCollection(fail_on="b-1")
+        errors: list[Path] = []
+        batcher = ChunkBatcher(
+            collection=collection,
+            embedder=embedder,
+            batch_size=10,
+            on_error=lambda p, exc: errors.append(p),
+        )
+        batcher.add(Path("a.pdf"), *_chunks("a", 2))
+        batcher.add(Path("b.pdf"), *_chunks("b", 2))
+        batcher.add(Path("c.pdf"), *_chunks("c", 1))
+        batcher.flush()
+
+        self.assertEqual(len(embedder.calls), 1)
+        self.assertEqual(errors, [Path("b.pdf")])
+        self.assertEqual(collection.ids, ["a-0", "a-1", "c-0"])
+        self.assertEqual([r.path.name for r in batcher.results], ["a.pdf", "c.pdf"])
+
+    def test_concurrent_batches_upsert_everything(self) -> None:
+        embedder = _FakeEmbedder()
+        collection = _FakeCollection()
+        with ChunkBatcher(
+            collection=collection, embedder=embedder, batch_size=2, max_inflight=3
+        ) as batcher:
+            for name in "abcdef":
+                batcher.add(Path(f"{name}.pdf"), *_chunks(name, 2))
+
+        self.assertEqual(len(embedder.calls), 6)
+        expected = sorted(f"{n}-{i}" for n in "abcdef" for i in (0, 1))
+        self.assertEqual(sorted(collection.ids), expected)
+        self.assertEqual(len(batcher.results), 6)
+
+
+class TestEmbedChunks(unittest.TestCase):
+    def test_requests_respect_count_and_char_limits(self) -> None:
+        embedder = _FakeEmbedder()
+        docs = ["aaaa", "bb", "cccccc", "d", "e", "f"]
+        vectors = embed_chunks(embedder, docs, batch_size=3, max_chars=8)
+
+        self.assertEqual(len(vectors), len(docs))
+        self.assertEqual(embedder.calls, [["aaaa", "bb"], ["cccccc", "d", "e"], ["f"]])
+
+    def test_oversized_doc_gets_its_own_request(self) -> None:
+        embedder = _FakeEmbedder()
+        embed_chunks(embedder, ["x" * 20, "y"], max_chars=8)
+        self.assertEqual(embedder.calls, [["x" * 20], ["y"]])
+
+    def test_duplicate_docs_are_embedded_once(self) -> None:
+        embedder = _FakeEmbedder()
+        vectors = embed_chunks(embedder, ["hdr", "body", "hdr", "x"])
+
+        self.assertEqual(embedder.calls, [["hdr", "body", "x"]])
+        self.assertEqual(len(vectors), 4)
+        self.assertEqual(vectors[0].tolist(), vectors[2].tolist())
+
+
+class TestCollectChunks(unittest.TestCase):
+    def test_ids_match_chunk_id(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "notes.txt"
+            path.write_text("lorem ipsum dolor sit amet " * 40, encoding="utf-8")
+            ids, docs, metas = collect_chunks(path=path, chunk_size=100, chunk_overlap=20)
+
+        self.assertGreater(len(ids), 10)
+        expected = [
+            _chunk_id(source_path=str(path), page=m["page"], chunk_index=m["chunk"])
+            for m in metas
+        ]
+        self.assertEqual(ids, expected)
+
+
+class TestPrefetchMap(unittest.TestCase):
+    def test_yields_in_input_order_with_errors(self) -> None:
+        def fn(n: int) -> int:
+            if n == 3:
+                raise ValueError("three")
+            return n * 10
+
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                out = list(prefetch_map(fn, range(6), workers=workers))
+                self.assertEqual([item for item, _, _ in out], list(range(6)))
+                self.assertEqual([r for _, r, _ in out], [0, 10, 20, None, 40, 50])
+                self.assertIsInstance(out[3][2], ValueError)
+
+    def test_index_files_with_and_without_prefetch(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            files = []
+            for name in ("a", "b", "c"):
+                path = root / f"{name}.txt"
+                path.write_text(f"{name} text", encoding="utf-8")
+                files.append(path)
+            for prefetch in (True, False):
+                with self.subTest(prefetch=prefetch):
+                    results = index_files(
+                        files=files,
+                        chroma_dir=root / f"chroma-{prefetch}",
+                        collection_name="zotero",
+                        embedder=_FakeEmbedder(),
+                        chunk_size=100,
+                        chunk_overlap=0,
+                        prefetch=prefetch,
+                    )
+                    self.assertEqual(
+                        [(r.path.name, r.chunks_added) for r in results],
+                        [("a.txt", 1), ("b.txt", 1), ("c.txt", 1)],
+                    )
+            close_clients()
+
+
+if __name__ == "__main__":
+    unittest.main()
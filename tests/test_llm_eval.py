@@ -0,0 +1,63 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from rag_zotero import llm_eval
+from rag_zotero.llm_eval import EvalItem, evaluate_relevance_openrouter_parallel
+
+
+class _FakeClient:
+    """Answers each single-candidate request with a canned reply keyed by the candidate text."""
+
+    def __init__(self, replies: dict[str, object]) -> None:
+        self.replies = replies
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, *, messages, **_kwargs):
+        (candidate,) = json.loads(messages[-1]["content"])["candidates"]
+        reply = self.replies[candidate["text"]]
+        if isinstance(reply, Exception):
+            raise reply
+        message = SimpleNamespace(content=json.dumps({"items": reply}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class TestParallelEvaluation(unittest.TestCase):
+    def _run(self, replies: dict[str, object]):
+        candidates = [{"idx": i, "text": text} for i, text in enumerate(replies)]
+        client = _FakeClient(replies)
+        with mock.patch.object(llm_eval, "_openrouter_client", return_value=client):
+            return evaluate_relevance_openrouter_parallel(
+                api_key="k", model="m", query="q", candidates=candidates, concurrency=2
+            )
+
+    def test_scores_are_pinned_to_the_requested_candidate(self) -> None:
+        report = self._run(
+            {
+                # The model echoes idx 0 for every candidate, or returns extra items.
+                "a": [{"idx": 0, "score": 0.9, "rationale": "a"}],
+                "b": [{"idx": 0, "score": 0.2, "rationale": "b"}],
+                "c": [
+                    {"idx": 0, "score": 0.5, "rationale": "c"},
+                    {"idx": 1, "score": 0.1, "rationale": "extra"},
+                ],
+                "d": [],
+                "e": RuntimeError("timeout"),
+            }
+        )
+        self.assertEqual(
+            report.items,
+            [EvalItem(0, 0.9, "a"), EvalItem(1, 0.2, "b"), EvalItem(2, 0.5, "c")],
+        )
+        self.assertEqual(sorted(report.errors), [3, 4])
+        self.assertIn("no items", report.errors[3])
+        self.assertEqual(report.errors[4], "timeout")
+
+    def test_all_requests_failing_raises(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, "down"):
+            self._run({"a": RuntimeError("down")})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from rag_zotero.query_cache import embed_query_cached
+
+
+class _CountingEmbedder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed_query(self, query: str) -> np.ndarray:
+        self.calls += 1
+        return np.array([0.5, -0.25, float(len(query))], dtype=np.float32)
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_second_lookup_is_served_from_disk(self) -> None:
+        embedder = _CountingEmbedder()
+        with tempfile.TemporaryDirectory() as td:
+            cache_dir = Path(td) / "cache"
+            first = embed_query_cached(embedder, "abc", model="m1", cache_dir=cache_dir)
+            second = embed_query_cached(embedder, "abc", model="m1", cache_dir=cache_dir)
+            self.assertEqual(first.tolist(), [0.5, -0.25, 3.0])
+            self.assertIsInstance(second, np.ndarray)
+            self.assertEqual(second.dtype, np.float32)
+            np.testing.assert_array_equal(second, first)
+            self.assertEqual(embedder.calls, 1)
+
+            embed_query_cached(embedder, "abc", model="m2", cache_dir=cache_dir)
+            self.assertEqual(embedder.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from rag_zotero.text_chunking import chunk_text
+
+
+def _reference(text: str, *, chunk_size: int, overlap: int) -> list[str]:
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_size)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(0, end - overlap)
+    return chunks
+
+
+class TestChunkText(unittest.TestCase):
+    def test_matches_stripping_every_window(self) -> None:
+        text = "  alpha beta\n\ngamma   delta epsilon\tzeta eta  theta    iota kappa  "
+        for chunk_size, overlap in [(5, 1), (7, 2), (10, 3), (12, 0), (200, 10)]:
+            with self.subTest(chunk_size=chunk_size, overlap=overlap):
+                self.assertEqual(
+                    chunk_text(text, chunk_size=chunk_size, overlap=overlap),
+                    _reference(text, chunk_size=chunk_size, overlap=overlap),
+                )
+
+    def test_whitespace_only_window_is_dropped(self) -> None:
+        self.assertEqual(chunk_text("ab      cd", chunk_size=3, overlap=0), ["ab", "c", "d"])
+
+    def test_short_text_is_a_single_chunk(self) -> None:
+        self.assertEqual(chunk_text("  short page \n", chunk_size=12, overlap=4), ["short page"])
+
+    def test_empty_text(self) -> None:
+        self.assertEqual(chunk_text("   ", chunk_size=10, overlap=2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
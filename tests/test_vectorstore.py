@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from rag_zotero.vectorstore import (
+    CHUNK_ID_SCHEME,
+    CHUNK_ID_SCHEME_KEY,
+    _client,
+    close_clients,
+    get_collection,
+    l2_normalize,
+    query_collection,
+)
+
+
+class TestChunkIdScheme(unittest.TestCase):
+    def setUp(self) -> None:
+        self._td = tempfile.TemporaryDirectory()
+        self.chroma_dir = Path(self._td.name)
+        self.addCleanup(self._td.cleanup)
+        self.addCleanup(close_clients)
+
+    def _legacy_collection(self, *, with_chunk: bool):
+        col = _client(str(self.chroma_dir)).create_collection(
+            name="legacy", metadata={"hnsw:space": "cosine"}
+        )
+        if with_chunk:
+            col.add(ids=["old-sha1-id"], embeddings=[[1.0, 0.0]], documents=["x"])
+        return col
+
+    def test_new_collection_records_scheme(self) -> None:
+        col = get_collection(chroma_dir=self.chroma_dir, name="fresh", for_indexing=True)
+        self.assertEqual(col.metadata[CHUNK_ID_SCHEME_KEY], CHUNK_ID_SCHEME)
+
+    def test_indexing_into_unmarked_non_empty_collection_fails(self) -> None:
+        self._legacy_collection(with_chunk=True)
+        with self.assertRaisesRegex(RuntimeError, "fresh collection"):
+            get_collection(chroma_dir=self.chroma_dir, name="legacy", for_indexing=True)
+        # Querying an old collection is still allowed.
+        col = get_collection(chroma_dir=self.chroma_dir, name="legacy")
+        self.assertEqual(col.count(), 1)
+
+    def test_opening_unmarked_collection_does_not_mark_it(self) -> None:
+        self._legacy_collection(with_chunk=True)
+        col = get_collection(chroma_dir=self.chroma_dir, name="legacy")
+        self.assertNotIn(CHUNK_ID_SCHEME_KEY, col.metadata or {})
+        self.assertEqual(col.metadata["hnsw:space"], "cosine")
+        with self.assertRaisesRegex(RuntimeError, "fresh collection"):
+            get_collection(chroma_dir=self.chroma_dir, name="legacy", for_indexing=True)
+
+    def test_unmarked_empty_collection_is_recreated_with_scheme(self) -> None:
+        self._legacy_collection(with_chunk=False)
+        col = get_collection(chroma_dir=self.chroma_dir, name="legacy", for_indexing=True)
+        self.assertEqual(col.metadata[CHUNK_ID_SCHEME_KEY], CHUNK_ID_SCHEME)
+
+
+class _RecordingCollection:
+    def __init__(self, res: dict) -> None:
+        self.res = res
+        self.calls: list[dict] = []
+
+    def query(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.res
+
+
+class TestQueryCollection(unittest.TestCase):
+    def test_query_rows_are_plain_lists(self) -> None:
+        col = _RecordingCollection(
+            {
+                "ids": [["a", "b"]],
+                "documents": [["doc a", None]],
+                "metadatas": [[{"title": "A"}, None]],
+                "distances": [[0.25, 1.0]],
+            }
+        )
+        results = query_collection(col, l2_normalize([3.0, 4.0]), n_results=2)
+
+        (call,) = col.calls
+        self.assertEqual(call["n_results"], 2)
+        (row,) = call["query_embeddings"]
+        self.assertIs(type(row), list)
+        self.assertEqual([round(x, 6) for x in row], [0.6, 0.8])
+        self.assertEqual([r.id for r in results], ["a", "b"])
+        self.assertEqual([r.score for r in results], [0.75, 0.0])
+        self.assertEqual(results[1].document, "")
+        self.assertEqual(results[1].metadata, {})
+
+    def test_queries_a_real_collection(self) -> None:
+        td = tempfile.TemporaryDirectory()
+        self.addCleanup(td.cleanup)
+        self.addCleanup(close_clients)
+        col = get_collection(chroma_dir=Path(td.name), name="query", for_indexing=True)
+        col.upsert(
+            ids=["x", "y"],
+            embeddings=l2_normalize([[1.0, 0.0], [0.0, 1.0]]),
+            documents=["about x", "about y"],
+            metadatas=[{"title": "X"}, {"title": "Y"}],
+        )
+        results = query_collection(col, l2_normalize([2.0, 0.1]), n_results=2)
+
+        self.assertEqual([r.id for r in results], ["x", "y"])
+        self.assertEqual(results[0].metadata, {"title": "X"})
+        self.assertGreater(results[0].score, results[1].score)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,29 @@
+import importlib.util
 import json
+import os
+import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from rag_zotero.zotero_export import load_zotero_export
+from rag_zotero.zotero_export import (
+    _attachment_key_from_path_field,
+    attachment_key_from_storage_path,
+    load_zotero_export,
+    load_zotero_export_payload,
+)
 
 
 class TestZoteroExport(unittest.TestCase):
-    def _load(self, payload) -> object:
+    def _load_file(self, payload) -> object:
         with tempfile.TemporaryDirectory() as td:
             p = Path(td) / "export.json"
             p.write_text(json.dumps(payload), encoding="utf-8")
             return load_zotero_export(p)
 
     def test_zotero_json_api_style_data_wrapper(self) -> None:
-        export = self._load(
+        export = load_zotero_export_payload(
             [
                 {
                     "key": "PARENT1",
@@ -44,8 +53,15 @@ class TestZoteroExport(unittest.TestCase):
         self.assertEqual(meta.get("doi"), "10.1234/abc")
         self.assertEqual(meta.get("url"), "https://example.com")
 
+        items = export.items_by_key
+        self.assertIs(export.items_by_key, items)
+        self.assertEqual(set(items), {"PARENT1", "ATTACH1"})
+        self.assertEqual(items["PARENT1"].title, "My Paper")
+        self.assertEqual(items["PARENT1"].creators, ("Ada Lovelace",))
+        self.assertIsNone(items.get("MISSING"))
+
     def test_better_bibtex_nested_attachments(self) -> None:
-        export = self._load(
+        export = load_zotero_export_payload(
             {
                 "items": [
                     {
@@ -67,7 +83,7 @@ class TestZoteroExport(unittest.TestCase):
         self.assertEqual(meta.get("citekey"), "Turing2019")
 
     def test_attachments_as_strings_and_absolute_local_path(self) -> None:
-        export = self._load(
+        export = load_zotero_export_payload(
             [
                 {
                     "itemKey": "PARENT4",
@@ -88,7 +104,7 @@ class TestZoteroExport(unittest.TestCase):
         self.assertEqual(meta5.get("title"), "String Attachments")
 
     def test_csl_issued_date_parts(self) -> None:
-        export = self._load(
+        export = load_zotero_export_payload(
             [
                 {
                     "key": "PARENT3",
@@ -104,6 +120,91 @@ class TestZoteroExport(unittest.TestCase):
         meta = export.metadata_for_attachment("ATTACH3")
         self.assertEqual(meta.get("year"), 2018)
 
+    def test_unsupported_structure_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            load_zotero_export_payload({"rows": []})
+        with self.assertRaises(ValueError):
+            self._load_file({"rows": []})
+
+    @unittest.skipUnless(importlib.util.find_spec("ijson"), "ijson not installed")
+    def test_streaming_parse_matches_full_parse(self) -> None:
+        rows = [
+            {"key": "P1", "data": {"itemType": "book", "title": "T", "date": "2001"}},
+            {"key": "A1", "data": {"itemType": "attachment", "parentItem": "P1"}},
+            "not a row",
+            {"itemKey": "P2", "title": "U", "attachments": [{"path": "storage:ZZZZ9999/x.pdf"}]},
+        ]
+        for payload in (rows, {"items": rows}, {"items": []}):
+            with self.subTest(wrapped=isinstance(payload, dict)):
+                streamed = self._load_file(payload)
+                with mock.patch.dict(sys.modules, {"ijson": None}):
+                    full = self._load_file(payload)
+                self.assertEqual(streamed, full)
+
+    def test_parsed_export_is_cached_until_file_changes(self) -> None:
+        payload = [
+            {"key": "PARENT1", "data": {"itemType": "book", "title": "Cached"}},
+            {"key": "ATTACH1", "data": {"itemType": "attachment", "parentItem": "PARENT1"}},
+        ]
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "export.json"
+            cache_dir = Path(td) / "cache"
+            p.write_text(json.dumps(payload), encoding="utf-8")
+            first = load_zotero_export(p, cache_dir=cache_dir)
+            self.assertEqual(len(list(cache_dir.glob("export_*.pkl"))), 1)
+            cached = load_zotero_export(p, cache_dir=cache_dir)
+            self.assertEqual(cached, first)
+            self.assertEqual(cached.items_by_key["PARENT1"].title, "Cached")
+
+            payload[0]["data"]["title"] = "Changed title"
+            p.write_text(json.dumps(payload), encoding="utf-8")
+            changed = load_zotero_export(p, cache_dir=cache_dir)
+            self.assertEqual(changed.metadata_for_attachment("ATTACH1")["title"], "Changed title")
+
+    def test_attachment_key_from_storage_path(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            storage = Path(td)
+            pdf = storage / "ABCD1234" / "paper.pdf"
+            self.assertEqual(
+                attachment_key_from_storage_path(file_path=pdf, storage_dir=storage), "ABCD1234"
+            )
+            outside = storage.parent / "elsewhere.pdf"
+            self.assertIsNone(
+                attachment_key_from_storage_path(file_path=outside, storage_dir=storage)
+            )
+
+    def test_attachment_key_with_relative_paths_follows_cwd(self) -> None:
+        prev_cwd = os.getcwd()
+        self.addCleanup(os.chdir, prev_cwd)
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            (Path(b) / "storage").mkdir()
+            rel_pdf = Path("storage/ABCD1234/paper.pdf")
+            os.chdir(a)
+            self.assertEqual(
+                attachment_key_from_storage_path(file_path=rel_pdf, storage_dir=Path("storage")),
+                "ABCD1234",
+            )
+            abs_in_b = Path(b).resolve() / rel_pdf
+            os.chdir(b)
+            # "storage" must now resolve under `b`, not the cached directory under `a`.
+            self.assertEqual(
+                attachment_key_from_storage_path(file_path=abs_in_b, storage_dir=Path("storage")),
+                "ABCD1234",
+            )
+
+    def test_attachment_key_from_path_field(self) -> None:
+        cases = {
+            "storage:ABCD1234/paper.pdf": "ABCD1234",
+            "/home/u/Zotero/storage/ABCD1234/paper.pdf": "ABCD1234",
+            "C:\\Users\\u\\Zotero\\storage\\WXYZ0987\\a.pdf": "WXYZ0987",
+            "/data/storage/notakey/x/storage/QWER5678": "QWER5678",
+            "/home/u/papers/paper.pdf": None,
+            "/home/u/mystorage/ABCD1234/paper.pdf": None,
+        }
+        for path_field, expected in cases.items():
+            with self.subTest(path_field=path_field):
+                self.assertEqual(_attachment_key_from_path_field(path_field), expected)
+
 
 if __name__ == "__main__":
     unittest.main()
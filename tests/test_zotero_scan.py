@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from rag_zotero import zotero_scan
+from rag_zotero.zotero_scan import scan_storage
+
+
+class TestScanStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self._td = tempfile.TemporaryDirectory()
+        self.root = Path(self._td.name)
+        for rel in [
+            "ABCD1234/paper.pdf",
+            "ABCD1234/notes.MD",
+            "ABCD1234/.zotero-ft-cache",
+            "EFGH5678/sub/deep.txt",
+            "EFGH5678/image.png",
+            "top.pdf",
+        ]:
+            p = self.root / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_text("x", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._td.cleanup()
+
+    def test_matches_rglob_for_any_worker_count(self) -> None:
+        expected = sorted(
+            p
+            for p in self.root.resolve().rglob("*")
+            if p.is_file() and p.suffix.lower() in {".pdf", ".txt", ".md"}
+        )
+        self.assertEqual(len(expected), 4)
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                self.assertEqual(scan_storage(self.root, workers=workers), expected)
+
+    def test_parallel_scan_of_many_item_folders(self) -> None:
+        for i in range(40):
+            item = self.root / f"ITEM{i:04d}"
+            (item / "sub").mkdir(parents=True)
+            (item / "a.pdf").write_text("x", encoding="utf-8")
+            (item / "sub" / "b.txt").write_text("x", encoding="utf-8")
+            (item / "c.png").write_text("x", encoding="utf-8")
+        expected = sorted(
+            p
+            for p in self.root.resolve().rglob("*")
+            if p.is_file() and p.suffix.lower() in {".pdf", ".txt", ".md"}
+        )
+        self.assertEqual(len(expected), 84)
+        for workers in (1, 3, 16):
+            with self.subTest(workers=workers):
+                self.assertEqual(scan_storage(self.root, workers=workers), expected)
+
+    def test_cached_listing_is_refreshed_when_attachment_folders_change(self) -> None:
+        cache_td = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_td.cleanup)
+        cache_dir = Path(cache_td.name)
+        first = scan_storage(self.root, cache_dir=cache_dir)
+        self.assertEqual(len(list(cache_dir.glob("scan_*.json"))), 1)
+        self.assertEqual(scan_storage(self.root, cache_dir=cache_dir), first)
+
+        item = self.root / "ABCD1234"
+        (item / "paper.pdf").rename(item / "Renamed.pdf")
+        renamed = scan_storage(self.root, cache_dir=cache_dir)
+        self.assertIn((item / "Renamed.pdf").resolve(), renamed)
+        self.assertNotIn((item / "paper.pdf").resolve(), renamed)
+
+        (item / "late.pdf").write_text("x", encoding="utf-8")
+        self.assertIn((item / "late.pdf").resolve(), scan_storage(self.root, cache_dir=cache_dir))
+
+        new_item = self.root / "IJKL9012"
+        new_item.mkdir()
+        (new_item / "new.pdf").write_text("x", encoding="utf-8")
+        refreshed = scan_storage(self.root, cache_dir=cache_dir)
+        self.assertIn((new_item / "new.pdf").resolve(), refreshed)
+        self.assertEqual(len(refreshed), len(first) + 2)
+
+    def test_cache_check_stats_folders_with_requested_workers(self) -> None:
+        for i in range(40):
+            (self.root / f"ITEM{i:04d}").mkdir()
+        cache_td = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_td.cleanup)
+        cache_dir = Path(cache_td.name)
+        first = scan_storage(self.root, cache_dir=cache_dir, workers=3)
+
+        pool_sizes: list[int] = []
+
+        def recording_pool(*args, **kwargs):
+            pool_sizes.append(kwargs["max_workers"])
+            return ThreadPoolExecutor(*args, **kwargs)
+
+        with (
+            mock.patch.object(zotero_scan, "ThreadPoolExecutor", side_effect=recording_pool),
+            mock.patch.object(zotero_scan, "iter_storage", side_effect=AssertionError),
+        ):
+            self.assertEqual(scan_storage(self.root, cache_dir=cache_dir, workers=3), first)
+        self.assertEqual(pool_sizes, [3])
+
+    def test_missing_dir_raises(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            scan_storage(self.root / "missing")
+
+
+if __name__ == "__main__":
+    unittest.main()